@@ -1,16 +1,41 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from pydantic import BaseModel
+from contextlib import nullcontext
+from typing import Literal
 import os
+import random
 
+from service import metrics, tracing
 from service.analyzer import analyze_text
+from service.jobs import QUEUED, JobStore, JobWorkers
+from service.router import get_router
+from service.store import ResultStore, ResultStoreUnavailable, get_result_store
 
 app = FastAPI(title="Fallacy Detector API")
 
+TRACE_SAMPLE_RATE = float(os.getenv("FALLACY_TRACE_SAMPLE_RATE", "0"))
+
+
+def _trace_context(request: Request):
+	"""
+	Tracing is opt-in: X-Fallacy-Trace / X-Fallacy-Profile headers or random sampling.
+	X-Trace-Id only names a trace that is already on, and only if it is a safe id.
+	"""
+	profile = request.headers.get("x-fallacy-profile") == "1"
+	wanted = profile or request.headers.get("x-fallacy-trace") == "1"
+	if not wanted and not (TRACE_SAMPLE_RATE and random.random() < TRACE_SAMPLE_RATE):
+		return nullcontext()
+	return tracing.start_trace(request.headers.get("x-trace-id"), profile=profile)
+
 
 class AnalyzeRequest(BaseModel):
 	text: str
 	model_id: str | None = None
 	threshold: float = 0.6
+	output_mode: Literal["json", "codes"] | None = None
+	label_distribution: bool = False
+	latency_budget_ms: float | None = None
+	deadline_ms: float | None = None
 
 
 class AnalyzeResponse(BaseModel):
@@ -19,15 +44,176 @@ class AnalyzeResponse(BaseModel):
 	fallacies: list
 	fallacy_types: list[str]
 	sentences_with_fallacies: list[str]
+	missing_sentences: list[int] = []
+	model_id: str | None = None
+	route: str | None = None
+	deadline_exceeded: bool = False
+	analysis_id: str | None = None
+	timings: dict[str, float] = {}
+	usage: dict[str, int] = {}
+
+
+class JobRequest(AnalyzeRequest):
+	chunk_sentences: int | None = None
+
+
+class JobStatus(BaseModel):
+	id: str
+	status: str
+	created: float
+	started: float | None = None
+	finished: float | None = None
+	total_chunks: int | None = None
+	done_chunks: int = 0
+	attempts: int = 0
+	error: str | None = None
+
 
+job_store: JobStore | None = None
+job_workers: JobWorkers | None = None
 
+
+@app.on_event("startup")
+def start_job_workers():
+	global job_store, job_workers
+	job_store = JobStore(os.getenv("FALLACY_JOB_DB", "jobs.db"))
+	workers = int(os.getenv("FALLACY_JOB_WORKERS", "2"))
+	if workers > 0:
+		job_workers = JobWorkers(
+			job_store,
+			workers=workers,
+			chunk_sentences=int(os.getenv("FALLACY_JOB_CHUNK_SENTENCES", "50")),
+			stale_after=float(os.getenv("FALLACY_JOB_STALE_SECONDS", "60")),
+			max_attempts=int(os.getenv("FALLACY_JOB_MAX_ATTEMPTS", "3")),
+		)
+		job_workers.start()
+
+
+@app.on_event("shutdown")
+def stop_job_workers():
+	if job_workers is not None:
+		job_workers.stop()
+
+
+def _resolve_model(req: AnalyzeRequest) -> str | None:
+	# Without an explicit model_id, configured routes take precedence over FALLACY_MODEL_ID
+	router = get_router()
+	model_id = req.model_id or (None if router else os.getenv("FALLACY_MODEL_ID"))
+	if not model_id and router is None:
+		raise HTTPException(status_code=400, detail="Model ID not provided (set model_id, FALLACY_MODEL_ID or FALLACY_ROUTES)")
+	return model_id
+
+
+# Sync endpoint: FastAPI runs it on the threadpool, so concurrent requests can
+# overlap (and be micro-batched) while each waits on the model
 @app.post("/analyze", response_model=AnalyzeResponse)
-async def analyze(req: AnalyzeRequest):
-	model_id = req.model_id or os.getenv("FALLACY_MODEL_ID")
-	if not model_id:
-		raise HTTPException(status_code=400, detail="Model ID not provided (set model_id or FALLACY_MODEL_ID)")
-	try:
-		result = analyze_text(req.text, model_id=model_id, threshold=req.threshold)
+def analyze(req: AnalyzeRequest, request: Request, response: Response):
+	model_id = _resolve_model(req)
+	with _trace_context(request) as trace:
+		headers = {"X-Trace-Id": trace.trace_id} if trace else None
+		try:
+			result = analyze_text(
+				req.text,
+				model_id=model_id,
+				threshold=req.threshold,
+				output_mode=req.output_mode,
+				label_distribution=req.label_distribution,
+				latency_budget_ms=req.latency_budget_ms,
+				deadline_ms=req.deadline_ms,
+			)
+		except Exception as e:
+			raise HTTPException(status_code=500, detail=str(e), headers=headers)
+		if headers:
+			response.headers.update(headers)
 		return AnalyzeResponse(**result)
-	except Exception as e:
-		raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/jobs", status_code=202)
+def create_job(req: JobRequest):
+	"""Queue a (large) document for background analysis; poll /jobs/{id} for progress."""
+	model_id = _resolve_model(req)
+	job_id = job_store.enqueue({**req.model_dump(), "model_id": model_id})
+	return {"job_id": job_id, "status": QUEUED}
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+def get_job(job_id: str):
+	status = job_store.status(job_id)
+	if status is None:
+		raise HTTPException(status_code=404, detail="Job not found")
+	return JobStatus(**status)
+
+
+@app.get("/jobs/{job_id}/results")
+def get_job_results(job_id: str):
+	"""Full result once done; while running, the fallacies of the chunks finished so far."""
+	results = job_store.results(job_id)
+	if results is None:
+		raise HTTPException(status_code=404, detail="Job not found")
+	return results
+
+
+def _result_store() -> ResultStore:
+	try:
+		store = get_result_store()
+	except ResultStoreUnavailable as e:
+		raise HTTPException(status_code=503, detail=str(e))
+	if store is None:
+		raise HTTPException(status_code=404, detail="Result store not enabled (set FALLACY_RESULT_DB)")
+	return store
+
+
+@app.get("/results")
+def list_results(
+	label: str | None = None,
+	min_confidence: float | None = None,
+	model_id: str | None = None,
+	since: float | None = None,
+	until: float | None = None,
+	q: str | None = None,
+	limit: int = Query(50, ge=1, le=1000),
+	offset: int = Query(0, ge=0),
+):
+	"""Stored analyses with at least one sentence matching the filters (times are Unix seconds)."""
+	try:
+		return _result_store().query_analyses(
+			label=label, min_confidence=min_confidence, model_id=model_id,
+			since=since, until=until, q=q, limit=limit, offset=offset,
+		)
+	except ValueError as e:
+		raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/results/sentences")
+def search_sentences(
+	label: str | None = None,
+	min_confidence: float | None = None,
+	max_confidence: float | None = None,
+	model_id: str | None = None,
+	since: float | None = None,
+	until: float | None = None,
+	q: str | None = None,
+	limit: int = Query(50, ge=1, le=1000),
+	offset: int = Query(0, ge=0),
+):
+	"""Stored sentences filtered by label, confidence, model and time; q is a full-text query."""
+	try:
+		return _result_store().query_sentences(
+			label=label, min_confidence=min_confidence, max_confidence=max_confidence, model_id=model_id,
+			since=since, until=until, q=q, limit=limit, offset=offset,
+		)
+	except ValueError as e:
+		raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/results/{analysis_id}")
+def get_result(analysis_id: str):
+	analysis = _result_store().get(analysis_id)
+	if analysis is None:
+		raise HTTPException(status_code=404, detail="Analysis not found")
+	return analysis
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+	return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
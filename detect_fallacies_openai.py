@@ -1,11 +1,21 @@
 import os
 import sys
+import csv
 import json
+import time
 import argparse
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
 import nltk
 from nltk.tokenize import sent_tokenize
 from openai import OpenAI
 
+from service.parsing import parse_results
+from service.prompts import LABELS, build_messages
+
 try:
     nltk.data.find('tokenizers/punkt_tab')
 except LookupError:
@@ -15,68 +25,18 @@ try:
 except LookupError:
     nltk.download('punkt', quiet=True)
 
-LABELS = [
-    "ad hominem",
-    "ad populum",
-    "appeal to emotion",
-    "circular reasoning",
-    "equivocation",
-    "fallacy of credibility",
-    "fallacy of extension",
-    "fallacy of logic",
-    "fallacy of relevance",
-    "false causality",
-    "false dilemma",
-    "faulty generalization",
-    "intentional",
-    "miscellaneous",
-    "none"
-]
-
-SYSTEM_PROMPT_COMPACT = (
-    "Classify each sentence into exactly one label from the allowed set. "
-    "Use the full paragraph context. Only label a fallacy if a clear, explicit instance is present; "
-    "otherwise return 'none'. Respond ONLY in compact JSON: results=[{index,label,confidence}]. "
-    "Set confidence to a probability between 0 and 1."
-)
-
-
-def build_batch_user_message(text: str, sentences: list[str]) -> str:
-    allowed = ", ".join(LABELS)
-    numbered = "\n".join(f"{i+1}. {s}" for i, s in enumerate(sentences))
-    return (
-        f"Allowed labels: {allowed}.\n"
-        f"Paragraph: {text}\n"
-        f"Sentences (numbered):\n{numbered}\n\n"
-        "Return JSON with array 'results', each item: {index, label, confidence}. "
-        "Index is the 1-based sentence number; label is one of the allowed labels; "
-        "confidence is a probability 0..1 for the chosen label."
-    )
-
 
 def classify_batch(client: OpenAI, model: str, text: str, sentences: list[str]) -> list[dict]:
     msg = client.chat.completions.create(
         model=model,
         temperature=0,
         max_tokens=512,  # allow larger JSON for many sentences
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT_COMPACT},
-            {"role": "user", "content": build_batch_user_message(text, sentences)}
-        ],
+        # Same messages the API sends and the fine-tune data was built with
+        messages=build_messages(text, sentences),
         response_format={"type": "json_object"}
     )
-    content = msg.choices[0].message.content
-    try:
-        data = json.loads(content)
-    except Exception:
-        # Fallback: extract first JSON object substring
-        start = content.find('{')
-        end = content.rfind('}')
-        if start != -1 and end != -1 and end > start:
-            data = json.loads(content[start:end+1])
-        else:
-            raise
-    results = data.get('results', [])
+    # Salvages every complete item even if the JSON is truncated or malformed
+    results, _ = parse_results(msg.choices[0].message.content)
     norm = []
     for item in results:
         try:
@@ -97,6 +57,31 @@ def classify_batch(client: OpenAI, model: str, text: str, sentences: list[str])
     return norm
 
 
+def classify_with_repair(client: OpenAI, model: str, text: str, sentences: list[str],
+                         spans: list[dict], max_rounds: int = 2) -> tuple[list[dict], list[int]]:
+    """Classify all sentences, then re-request only the ones missing from the response"""
+    batch = classify_batch(client, model, text, sentences)
+    seen = {item['index'] for item in batch}
+    missing = [i for i in range(len(sentences)) if i not in seen]
+    group_size = max(8, len(batch))
+
+    for _ in range(max_rounds):
+        if not missing:
+            break
+        for g in range(0, len(missing), group_size):
+            group = missing[g:g + group_size]
+            lo = max(0, group[0] - 2)
+            hi = min(len(spans) - 1, group[-1] + 2)
+            context = text[spans[lo]['start']:spans[hi]['end']]
+            for item in classify_batch(client, model, context, [sentences[i] for i in group]):
+                idx = group[item['index']]
+                if idx not in seen:
+                    seen.add(idx)
+                    batch.append({**item, 'index': idx})
+        missing = [i for i in missing if i not in seen]
+    return batch, missing
+
+
 def find_fallacy_spans(text: str, sentences: list[str]):
     spans = []
     current_pos = 0
@@ -111,13 +96,232 @@ def find_fallacy_spans(text: str, sentences: list[str]):
     return spans
 
 
+def detect_text(client: OpenAI, model: str, text: str) -> dict:
+    try:
+        sentences = sent_tokenize(text)
+    except Exception:
+        sentences = [s.strip() for s in text.split('.') if s.strip()]
+
+    if not sentences:
+        return {'input_text': text, 'total_sentences': 0, 'fallacies': []}
+
+    # Batch classify using full context
+    spans = find_fallacy_spans(text, sentences)
+    batch, missing = classify_with_repair(client, model, text, sentences, spans)
+    by_index = {}
+    for item in batch:
+        by_index.setdefault(item['index'], item)
+
+    results = []
+    for i, span in enumerate(spans):
+        item = by_index.get(i)
+        label = item['label'] if item else 'none'
+        confidence = float(item.get('confidence', 0.0)) if item else 0.0
+        results.append({
+            'fallacy_type': label,
+            'text': span['text'],
+            'start_char': span['start'],
+            'end_char': span['end'],
+            'confidence': round(confidence, 4)
+        })
+
+    return {
+        'input_text': text,
+        'total_sentences': len(sentences),
+        'fallacies': results,
+        'missing_sentences': missing
+    }
+
+
+def iter_corpus(path: str, text_field: str, id_field: str):
+    """
+    Yield (record_id, text, error) one record at a time from a JSONL file, CSV file or
+    directory of .txt files. A record that cannot be read or parsed is yielded with its
+    error (and the line number or file name as id) instead of stopping the stream.
+    """
+    p = Path(path)
+    if p.is_dir():
+        for fp in sorted(p.rglob('*.txt')):
+            record_id = str(fp.relative_to(p))
+            try:
+                yield record_id, fp.read_text(encoding='utf-8'), None
+            except (OSError, UnicodeDecodeError) as e:
+                yield record_id, None, f'Cannot read {record_id}: {e}'
+    elif p.suffix.lower() == '.csv':
+        csv.field_size_limit(sys.maxsize)
+        # Undecodable bytes become U+FFFD: a CSV row cannot be skipped without losing sync
+        with open(p, 'r', encoding='utf-8', errors='replace', newline='') as f:
+            for n, row in enumerate(csv.DictReader(f)):
+                yield row.get(id_field) or n, row.get(text_field) or '', None
+    else:
+        with open(p, 'rb') as f:
+            for n, raw in enumerate(f):
+                if not raw.strip():
+                    continue
+                try:
+                    rec = json.loads(raw.decode('utf-8'))
+                    if not isinstance(rec, dict):
+                        raise ValueError('record is not a JSON object')
+                except ValueError as e:
+                    yield n, None, f'Invalid JSON on line {n + 1}: {e}'
+                    continue
+                yield rec.get(id_field, n), rec.get(text_field) or '', None
+
+
+def read_checkpoint(path: Path) -> dict:
+    if path.exists():
+        return json.loads(path.read_text(encoding='utf-8'))
+    return {'records': 0, 'output_bytes': 0}
+
+
+def write_checkpoint(path: Path, state: dict):
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    tmp.write_text(json.dumps(state), encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def part_path(out_dir: Path, index: int, fmt: str) -> Path:
+    return out_dir / f'part-{index:05d}.{fmt}'
+
+
+def run_corpus(client: OpenAI, args):
+    """
+    Stream records through a bounded pool and append NDJSON in input order.
+    At most --concurrency * 2 records are held at once. The checkpoint stores how many
+    records and output bytes are committed, so a rerun truncates any partial tail and
+    resumes at the next record.
+    With --format parquet/arrow the output is a directory with one part file per
+    checkpoint, and a rerun discards parts written after the last checkpoint.
+    """
+    out_path = Path(args.output)
+    ckpt_path = Path(args.checkpoint or f'{args.output}.ckpt')
+    state = read_checkpoint(ckpt_path)
+    columnar = args.format != 'json'
+    if columnar:
+        # Imported lazily so JSON runs skip the columnar module and its dependencies
+        from service.columnar import ColumnarResult, write_file
+    state.setdefault('parts', 0)
+
+    if out_path.exists() and not ckpt_path.exists() and not args.overwrite \
+            and (any(out_path.iterdir()) if out_path.is_dir() else out_path.stat().st_size):
+        print(f'Error: {out_path} exists and there is no checkpoint {ckpt_path} to resume from. '
+              f'Use --overwrite to replace it.')
+        sys.exit(1)
+    if out_path.exists():
+        if columnar:
+            for stale in out_path.glob(f'part-*.{args.format}'):
+                if int(stale.stem.split('-')[1]) >= state['parts']:
+                    stale.unlink()
+        else:
+            with open(out_path, 'r+b') as f:
+                f.truncate(state['output_bytes'])
+    elif state['records']:
+        print(f'Error: checkpoint {ckpt_path} exists but {out_path} is missing.')
+        sys.exit(1)
+    elif columnar:
+        out_path.mkdir(parents=True)
+    if state['records']:
+        print(f"Resuming after {state['records']} records")
+
+    def work(record_id, text, error):
+        text = (text or '').strip()
+        try:
+            if error is not None:
+                raise ValueError(error)
+            out = detect_text(client, args.model, text)
+        except Exception as e:
+            out = {'error': str(e)}
+        else:
+            if columnar:
+                # Sentence text is sliced back out of input_text, so it is always kept
+                out['model_id'] = args.model
+            elif not args.include_text:
+                out.pop('input_text', None)
+        if columnar:
+            return ColumnarResult.from_result(out, id=record_id)
+        return {'id': record_id, **out}
+
+    records = itertools.islice(iter_corpus(args.corpus, args.text_field, args.id_field), state['records'], None)
+    window = args.concurrency * 2
+    t0 = time.perf_counter()
+    written = 0
+
+    parts = []
+
+    def commit(out):
+        if parts:
+            write_file(str(part_path(out_path, state['parts'], args.format)), parts, args.format)
+            state['parts'] += 1
+            parts.clear()
+        if out is not None:
+            out.flush()
+        write_checkpoint(ckpt_path, state)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool, \
+            (nullcontext() if columnar else open(out_path, 'ab')) as out:
+        pending = deque()
+
+        def flush_head():
+            nonlocal written
+            result = pending.popleft().result()
+            if columnar:
+                parts.append(result)
+            else:
+                line = json.dumps(result, ensure_ascii=False) + '\n'
+                out.write(line.encode('utf-8'))
+                state['output_bytes'] += len(line.encode('utf-8'))
+            written += 1
+            state['records'] += 1
+            if written % args.checkpoint_every == 0:
+                commit(out)
+                rate = written / (time.perf_counter() - t0)
+                print(f"{state['records']} records ({rate:.1f}/s)")
+
+        try:
+            for record_id, text, error in records:
+                pending.append(pool.submit(work, record_id, text, error))
+                while len(pending) >= window or (pending and pending[0].done()):
+                    flush_head()
+        finally:
+            try:
+                # In-flight records finish before the pool shuts down anyway, so keep them
+                while pending:
+                    flush_head()
+            finally:
+                # Checkpoint everything written, even when the run is aborted
+                commit(out)
+
+    print(f"Processed {written} records ({state['records']} total) -> {out_path}")
+
+
+def positive_int(value: str) -> int:
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f'must be at least 1, got {n}')
+    return n
+
+
 def main():
     parser = argparse.ArgumentParser(description='Detect fallacies using a fine-tuned OpenAI model (context-aware batch)')
     parser.add_argument('--model', required=True, help='Fine-tuned OpenAI model id/name')
     parser.add_argument('--text', type=str, help='Text to analyze')
     parser.add_argument('--file', type=str, help='Input file path')
-    parser.add_argument('--output', type=str, default='output_openai.json', help='Output JSON path')
+    parser.add_argument('--output', type=str,
+                        help='Output path (NDJSON in corpus mode); default output_openai.<format>')
+    parser.add_argument('--corpus', type=str, help='Corpus to stream: .jsonl, .csv or a directory of .txt files')
+    parser.add_argument('--text-field', default='text', help='Text field/column for JSONL/CSV corpora')
+    parser.add_argument('--id-field', default='id', help='Id field/column for JSONL/CSV corpora')
+    parser.add_argument('--concurrency', type=positive_int, default=4, help='Records analyzed in parallel in corpus mode')
+    parser.add_argument('--checkpoint', type=str, help='Checkpoint path (default <output>.ckpt)')
+    parser.add_argument('--checkpoint-every', type=positive_int, default=50, help='Records between checkpoints')
+    parser.add_argument('--overwrite', action='store_true',
+                        help='Replace an existing corpus output that has no checkpoint to resume from')
+    parser.add_argument('--include-text', action='store_true', help='Keep input_text in corpus output records')
+    parser.add_argument('--format', choices=['json', 'parquet', 'arrow'], default='json',
+                        help='Output format; parquet/arrow write compact columns (a directory of parts in corpus mode)')
     args = parser.parse_args()
+    if args.output is None:
+        args.output = f'output_openai.{args.format}'
 
     if not os.getenv('OPENAI_API_KEY'):
         print('Error: OPENAI_API_KEY is not set in environment.')
@@ -125,6 +329,10 @@ def main():
 
     client = OpenAI()
 
+    if args.corpus:
+        run_corpus(client, args)
+        return
+
     # Read input
     if args.file:
         with open(args.file, 'r', encoding='utf-8') as f:
@@ -139,47 +347,14 @@ def main():
         print('Error: No input text provided.')
         sys.exit(1)
 
-    try:
-        sentences = sent_tokenize(text)
-    except Exception:
-        sentences = [s.strip() for s in text.split('.') if s.strip()]
+    out = detect_text(client, args.model, text)
 
-    if not sentences:
-        out = {'input_text': text, 'total_sentences': 0, 'fallacies': []}
+    if args.format != 'json':
+        from service.columnar import ColumnarResult, write_file
+        write_file(args.output, [ColumnarResult.from_result({**out, 'model_id': args.model})], args.format)
+    else:
         with open(args.output, 'w', encoding='utf-8') as f:
             json.dump(out, f, indent=2, ensure_ascii=False)
-        print(f'Saved results to {args.output}')
-        return
-
-    # Batch classify using full context
-    batch = classify_batch(client, args.model, text, sentences)
-    spans = find_fallacy_spans(text, sentences)
-
-    results = []
-    for i, span in enumerate(spans):
-        label = 'none'
-        confidence = 0.0
-        for item in batch:
-            if item['index'] == i:
-                label = item['label']
-                confidence = float(item.get('confidence', 0.0))
-                break
-        results.append({
-            'fallacy_type': label,
-            'text': span['text'],
-            'start_char': span['start'],
-            'end_char': span['end'],
-            'confidence': round(confidence, 4)
-        })
-
-    out = {
-        'input_text': text,
-        'total_sentences': len(sentences),
-        'fallacies': results
-    }
-
-    with open(args.output, 'w', encoding='utf-8') as f:
-        json.dump(out, f, indent=2, ensure_ascii=False)
 
     print(f'Saved results to {args.output}')
 
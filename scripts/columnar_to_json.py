@@ -0,0 +1,43 @@
+import sys
+import json
+import argparse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from service.columnar import from_table, read_file  # noqa: E402
+
+
+def iter_files(path: Path):
+    if path.is_dir():
+        yield from sorted(p for p in path.iterdir() if p.suffix in ('.parquet', '.arrow'))
+    else:
+        yield path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert columnar (Parquet/Arrow) results back to the JSON result shape')
+    parser.add_argument('input', help='Parquet/Arrow file or a corpus output directory of part files')
+    parser.add_argument('--output', default='-', help='NDJSON output path (default stdout)')
+    parser.add_argument('--id', help='Only convert the record with this id')
+    args = parser.parse_args()
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    count = 0
+    try:
+        for path in iter_files(Path(args.input)):
+            table = read_file(str(path))
+            for result in from_table(table):
+                if args.id is not None and str(result.id) != args.id:
+                    continue
+                out.write(json.dumps(result.to_dict(), ensure_ascii=False) + '\n')
+                count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f'Converted {count} records', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
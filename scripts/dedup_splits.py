@@ -0,0 +1,294 @@
+import re
+import csv
+import json
+import hashlib
+import argparse
+from array import array
+from pathlib import Path
+from collections import defaultdict
+
+import pandas as pd
+
+# Splits are processed in priority order: rows seen first are canonical, so a
+# training row that duplicates a test row is the one reported and dropped.
+DATASETS = {
+    'climate': {
+        'test': 'data/climate_test.csv',
+        'dev': 'data/climate_dev.csv',
+        'train': 'data/climate_train.csv',
+    },
+    'edu': {
+        'test': 'data/edu_test.csv',
+        'dev': 'data/edu_dev.csv',
+        'train': 'data/edu_train.csv',
+    },
+}
+
+LABEL_COLUMNS = ['updated_label', 'logical_fallacies']
+
+NUM_PERM = 64
+# Probability that a pair at exactly --threshold similarity shares at least one LSH band
+CANDIDATE_RECALL = 0.99
+SHINGLE_SIZE = 3
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_BUCKET = 32
+PREVIEW_CHARS = 200
+REPORTED_DUPLICATES = 200
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def _permutations(num_perm: int, seed: int = 1):
+    """Deterministic (a, b) pairs for the universal hash family used by MinHash"""
+    perms = []
+    for i in range(num_perm):
+        digest = hashlib.blake2b(f"{seed}:{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], 'little') % MERSENNE_PRIME or 1
+        b = int.from_bytes(digest[8:], 'little') % MERSENNE_PRIME
+        perms.append((a, b))
+    return perms
+
+
+PERMS = _permutations(NUM_PERM)
+
+
+def normalize(text: str) -> list[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def exact_hash(tokens: list[str]) -> bytes:
+    return hashlib.blake2b(' '.join(tokens).encode('utf-8'), digest_size=8).digest()
+
+
+def minhash(tokens: list[str]) -> array:
+    """MinHash signature over word shingles (whole text if shorter than one shingle)"""
+    if len(tokens) < SHINGLE_SIZE:
+        shingles = {' '.join(tokens)}
+    else:
+        shingles = {' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little')
+        for s in shingles
+    ]
+    sig = array('Q', [MERSENNE_PRIME] * NUM_PERM)
+    for h in hashes:
+        for i, (a, b) in enumerate(PERMS):
+            v = (a * h + b) % MERSENNE_PRIME
+            if v < sig[i]:
+                sig[i] = v
+    return sig
+
+
+def similarity(sig_a: array, sig_b: array) -> float:
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def choose_bands(threshold: float, num_perm: int = NUM_PERM, recall: float = CANDIDATE_RECALL) -> tuple[int, int]:
+    """
+    (bands, rows) for LSH: the widest bands (fewest false candidates) for which a pair at
+    the threshold still becomes a candidate with at least the given probability,
+    1 - (1 - s^rows)^bands. Candidates are then checked against the threshold exactly.
+    """
+    for rows in sorted((r for r in range(1, num_perm + 1) if num_perm % r == 0), reverse=True):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            return bands, rows
+    return num_perm, 1
+
+
+def band_keys(sig: array, rows: int):
+    for band in range(len(sig) // rows):
+        chunk = sig[band * rows:(band + 1) * rows]
+        yield band, hashlib.blake2b(chunk.tobytes(), digest_size=8).digest()
+
+
+def iter_rows(path: str, chunksize: int):
+    """Yield (row_index, text, label) without holding the whole CSV in memory"""
+    row_index = 0
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        label_col = next((c for c in LABEL_COLUMNS if c in chunk.columns), None)
+        for _, row in chunk.iterrows():
+            text = row.get('source_article')
+            label = row.get(label_col) if label_col else None
+            yield row_index, ('' if pd.isna(text) else str(text)), ('' if pd.isna(label) else str(label).strip())
+            row_index += 1
+
+
+class DedupIndex:
+    """Exact-hash and MinHash/LSH index over every split of one corpus.
+
+    Only hashes, signatures and row references are kept, never the texts;
+    attach_previews() re-reads the reported rows afterwards.
+    Bands are sized from the threshold (choose_bands) so near duplicates are
+    rarely missed. Each LSH bucket holds at most MAX_BUCKET canonical rows, so
+    work per row stays constant and the whole pass is linear in corpus size.
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.bands, self.rows = choose_bands(threshold)
+        self.exact = {}
+        self.signatures = []
+        self.refs = []
+        self.buckets = defaultdict(list)
+        self.leaks = []
+        self.duplicates = []
+        self.drop = set()
+
+    def add(self, split: str, row_index: int, text: str, label: str):
+        tokens = normalize(text)
+        if not tokens:
+            return
+        h = exact_hash(tokens)
+
+        match = None
+        if h in self.exact:
+            match = (self.exact[h], 1.0, 'exact')
+        else:
+            sig = minhash(tokens)
+            candidates = set()
+            for key in band_keys(sig, self.rows):
+                candidates.update(self.buckets.get(key, ()))
+            best = None
+            for ref_id in candidates:
+                sim = similarity(sig, self.signatures[ref_id])
+                if sim >= self.threshold and (best is None or sim > best[1]):
+                    best = (ref_id, sim, 'near')
+            match = best
+
+            if match is None:
+                ref_id = len(self.refs)
+                self.exact[h] = ref_id
+                self.signatures.append(sig)
+                self.refs.append({'split': split, 'row': row_index, 'label': label})
+                for key in band_keys(sig, self.rows):
+                    bucket = self.buckets[key]
+                    if len(bucket) < MAX_BUCKET:
+                        bucket.append(ref_id)
+                return
+
+        ref_id, sim, kind = match
+        ref = self.refs[ref_id]
+        entry = {
+            'kind': kind,
+            'similarity': round(sim, 4),
+            'split': split,
+            'row': row_index,
+            'label': label,
+            'text': None,  # filled in by attach_previews
+            'matches': ref,
+            'label_conflict': bool(label and ref['label'] and label != ref['label']),
+        }
+        if ref['split'] != split:
+            self.leaks.append(entry)
+        else:
+            self.duplicates.append(entry)
+        self.drop.add((split, row_index))
+
+    def conflicts(self) -> int:
+        """Exact and near duplicates whose label differs from the row they match"""
+        return sum(1 for entry in self.leaks + self.duplicates if entry['label_conflict'])
+
+
+def preview(text: str) -> str:
+    return text[:PREVIEW_CHARS] + '...' if len(text) > PREVIEW_CHARS else text
+
+
+def attach_previews(splits: dict, index: DedupIndex, chunksize: int):
+    """Streaming pass that adds text previews to the reported rows and the rows they match"""
+    entries = index.leaks + index.duplicates[:REPORTED_DUPLICATES]
+    wanted = {}
+    for entry in entries:
+        wanted[(entry['split'], entry['row'])] = None
+        wanted[(entry['matches']['split'], entry['matches']['row'])] = None
+    for split, path in splits.items():
+        if Path(path).exists() and any(s == split for s, _ in wanted):
+            for row_index, text, _ in iter_rows(path, chunksize):
+                if (split, row_index) in wanted:
+                    wanted[(split, row_index)] = preview(text)
+    for entry in entries:
+        entry['text'] = wanted[(entry['split'], entry['row'])]
+        entry['matches']['text'] = wanted[(entry['matches']['split'], entry['matches']['row'])]
+
+
+def scan_corpus(name: str, splits: dict, threshold: float, chunksize: int) -> DedupIndex:
+    print("=" * 80)
+    print(f"DEDUPLICATING {name.upper()} DATASET")
+    print("=" * 80)
+    index = DedupIndex(threshold)
+    print(f"LSH: {index.bands} bands x {index.rows} rows")
+    for split, path in splits.items():
+        if not Path(path).exists():
+            print(f"\n--- {split.upper()} split not found ({path}) ---")
+            continue
+        count = 0
+        for row_index, text, label in iter_rows(path, chunksize):
+            index.add(split, row_index, text, label)
+            count += 1
+        print(f"\n--- {split.upper()} split ({count} rows) ---")
+    attach_previews(splits, index, chunksize)
+
+    print(f"\nCross-split leaks: {len(index.leaks)}")
+    print(f"Within-split duplicates: {len(index.duplicates)}")
+    print(f"Duplicates with conflicting labels: {index.conflicts()}")
+    for item in index.leaks[:20]:
+        print(f"\n[{item['split']}:{item['row']}] {item['kind']} ({item['similarity']}) "
+              f"of [{item['matches']['split']}:{item['matches']['row']}]")
+        print(f"    Text: {item['text']}")
+        if item['label_conflict']:
+            print(f"    Label conflict: {item['label']} vs {item['matches']['label']}")
+    return index
+
+
+def write_clean(splits: dict, index: DedupIndex, outdir: Path, chunksize: int):
+    """Second streaming pass: copy every split, skipping rows flagged as duplicates"""
+    outdir.mkdir(parents=True, exist_ok=True)
+    for split, path in splits.items():
+        if not Path(path).exists():
+            continue
+        out_path = outdir / Path(path).name
+        row_index = 0
+        kept = 0
+        header_written = False
+        with open(out_path, 'w', encoding='utf-8', newline='') as f:
+            for chunk in pd.read_csv(path, chunksize=chunksize):
+                mask = [(split, row_index + i) not in index.drop for i in range(len(chunk))]
+                row_index += len(chunk)
+                clean = chunk[mask]
+                clean.to_csv(f, index=False, header=not header_written, quoting=csv.QUOTE_MINIMAL)
+                header_written = True
+                kept += len(clean)
+        print(f"Wrote {kept}/{row_index} rows to {out_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Detect exact and near-duplicate texts leaking across dataset splits')
+    parser.add_argument('--threshold', type=float, default=0.8, help='Estimated Jaccard similarity for near duplicates (default 0.8)')
+    parser.add_argument('--chunksize', type=int, default=5000, help='CSV rows read per chunk')
+    parser.add_argument('--report', default='dedup_report.json', help='Output JSON report path')
+    parser.add_argument('--emit-clean', type=str, help='Directory to write cleaned splits to')
+    args = parser.parse_args()
+
+    report = {'threshold': args.threshold, 'datasets': {}}
+    for name, splits in DATASETS.items():
+        index = scan_corpus(name, splits, args.threshold, args.chunksize)
+        report['datasets'][name] = {
+            'leaks': len(index.leaks),
+            'duplicates': len(index.duplicates),
+            'label_conflicts': index.conflicts(),
+            'lsh': {'bands': index.bands, 'rows': index.rows},
+            'details': {
+                'leaks': index.leaks,
+                'duplicates': index.duplicates[:REPORTED_DUPLICATES],
+            }
+        }
+        if args.emit_clean:
+            write_clean(splits, index, Path(args.emit_clean), args.chunksize)
+
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nFull report saved to: {args.report}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,321 @@
+import os
+import re
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the OpenAI chat completions endpoint, speaking this project's
+# prompt format. Point the analyzer at it with:
+#   OPENAI_BASE_URL=http://127.0.0.1:8080/v1 OPENAI_API_KEY=sim
+
+# Codes-mode reminder after the sentence list
+TRAILER_RE = re.compile(r'\n\nReturn exactly \d+ lines\.\s*$')
+CACHE_BLOCK_CHARS = 512  # ~128 tokens
+MIN_CACHED_TOKENS = 1024
+
+
+def _hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def parse_sentences(user: str) -> list[str]:
+    """
+    Sentences from the numbered list in the user message. A line starts sentence n only
+    when n is the next expected number; other lines (sentences may contain blank lines)
+    continue the current sentence.
+    """
+    start = user.find('Sentences (numbered):\n')
+    if start == -1:
+        return []
+    block = user[start + len('Sentences (numbered):\n'):]
+    block = TRAILER_RE.sub('', block).rstrip('\n')
+    sentences = []
+    for line in block.split('\n'):
+        prefix = f'{len(sentences) + 1}. '
+        if line.startswith(prefix):
+            sentences.append(line[len(prefix):])
+        elif sentences:
+            sentences[-1] += '\n' + line
+    return sentences
+
+
+def parse_prompt(messages: list[dict]):
+    """Return (mode, labels or code map, sentences) from the analyzer's prompt"""
+    # Instructions may sit in the system message and the document in the user message
+    user = '\n'.join(str(m.get('content') or '') for m in messages)
+    documents = [str(m.get('content') or '') for m in messages if m.get('role') == 'user']
+    sentences = parse_sentences(documents[-1] if documents else user)
+
+    codes = re.search(r'Label codes: (.*?)\.\n', user)
+    if codes:
+        mapping = dict(part.split('=', 1) for part in codes.group(1).split(', ') if '=' in part)
+        return 'codes', mapping, sentences
+    allowed = re.search(r'Allowed labels: (.*?)\.\n', user)
+    labels = allowed.group(1).split(', ') if allowed else ['none']
+    return 'json', labels, sentences
+
+
+def predict(sentence: str, labels: list[str], none_rate: float) -> tuple[str, float]:
+    """Deterministic label and confidence from the sentence text"""
+    h = _hash(sentence)
+    confidence = 0.5 + (h % 5000) / 10000
+    others = [label for label in labels if label != 'none']
+    if not others or (h >> 16) % 10000 < none_rate * 10000:
+        return 'none', confidence
+    return others[(h >> 32) % len(others)], confidence
+
+
+class PrefixCache:
+    """Approximates provider prompt caching: hits on previously seen 128-token prefix blocks."""
+
+    def __init__(self, max_entries: int = 200000):
+        self.seen = set()
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+
+    def lookup_and_add(self, prompt: str) -> int:
+        cached_chars = 0
+        with self.lock:
+            for end in range(CACHE_BLOCK_CHARS, len(prompt) + 1, CACHE_BLOCK_CHARS):
+                key = _hash(prompt[:end])
+                if key in self.seen and cached_chars == end - CACHE_BLOCK_CHARS:
+                    cached_chars = end
+                if len(self.seen) < self.max_entries:
+                    self.seen.add(key)
+        tokens = cached_chars // 4
+        return tokens if tokens >= MIN_CACHED_TOKENS else 0
+
+
+class Simulator:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.lock = threading.Lock()
+        self.cache = PrefixCache()
+
+    def rand(self) -> float:
+        with self.lock:
+            return self.rng.random()
+
+    def latency_ms(self) -> float:
+        a = self.args
+        with self.lock:
+            if a.latency_dist == 'fixed':
+                v = a.latency_ms
+            elif a.latency_dist == 'normal':
+                v = self.rng.gauss(a.latency_ms, a.latency_jitter_ms)
+            elif a.latency_dist == 'exponential':
+                v = self.rng.expovariate(1.0 / max(a.latency_ms, 1e-3))
+            else:
+                sigma = math.log1p(a.latency_jitter_ms / max(a.latency_ms, 1e-3))
+                v = self.rng.lognormvariate(math.log(max(a.latency_ms, 1e-3)), sigma)
+        return max(0.0, v)
+
+    def build(self, body: dict):
+        """Return (pieces, logprob entries, finish_reason, usage)"""
+        messages = body.get('messages') or []
+        mode, labels, sentences = parse_prompt(messages)
+        max_tokens = body.get('max_tokens') or body.get('max_completion_tokens') or 4096
+
+        if mode == 'codes':
+            code_of = {label: code for code, label in labels.items()}
+            pieces, entries = [], []
+            for i, s in enumerate(sentences):
+                label, conf = predict(s, list(labels.values()), self.args.none_rate)
+                code = code_of.get(label, next(iter(labels), 'A'))
+                alt = next((c for c in labels if c != code), code)
+                top = [{'token': code, 'logprob': math.log(conf), 'bytes': None},
+                       {'token': alt, 'logprob': math.log(max(1e-6, 1 - conf)), 'bytes': None}]
+                pieces.append(code)
+                entries.append({'token': code, 'logprob': math.log(conf), 'bytes': None, 'top_logprobs': top})
+                if i < len(sentences) - 1:
+                    pieces.append('\n')
+                    entries.append({'token': '\n', 'logprob': 0.0, 'bytes': None, 'top_logprobs': []})
+        else:
+            items = []
+            for i, s in enumerate(sentences):
+                label, conf = predict(s, labels, self.args.none_rate)
+                items.append(json.dumps({'index': i + 1, 'label': label, 'confidence': round(conf, 2)},
+                                        separators=(',', ':')))
+            # Split into ~token-sized pieces: each item is roughly 12 tokens
+            content = '{"results":[' + ','.join(items) + ']}'
+            pieces = [content[i:i + 4] for i in range(0, len(content), 4)]
+            entries = None
+
+        finish = 'stop'
+        limit = max_tokens
+        if self.rand() < self.args.truncate_rate and len(pieces) > 1:
+            limit = min(limit, int(len(pieces) * self.rand()) or 1)
+        if len(pieces) > limit:
+            pieces = pieces[:limit]
+            entries = entries[:limit] if entries is not None else None
+            finish = 'length'
+
+        prompt = ''.join(str(m.get('content') or '') for m in messages)
+        usage = {
+            'prompt_tokens': max(1, len(prompt) // 4),
+            'completion_tokens': len(pieces),
+            'total_tokens': max(1, len(prompt) // 4) + len(pieces),
+            'prompt_tokens_details': {'cached_tokens': self.cache.lookup_and_add(prompt)},
+        }
+        return pieces, entries, finish, usage
+
+
+def make_handler(sim: Simulator):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, fmt, *args):
+            if sim.args.verbose:
+                super().log_message(fmt, *args)
+
+        def _json(self, status: int, payload: dict, headers: dict | None = None):
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                self._json(404, {'error': {'message': f'Unknown path {self.path}', 'type': 'invalid_request_error'}})
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+            a = sim.args
+
+            if sim.rand() < a.rate_429:
+                self._json(429, {'error': {'message': 'Rate limit reached (simulated)', 'type': 'rate_limit_exceeded'}},
+                           {'Retry-After': '1'})
+                return
+            if sim.rand() < a.timeout_rate:
+                # Hang past any sane client timeout, then drop the connection
+                time.sleep(a.timeout_seconds)
+                self.close_connection = True
+                return
+
+            pieces, entries, finish, usage = sim.build(body)
+            time.sleep(sim.latency_ms() / 1000.0)
+            per_token = 1.0 / a.tokens_per_sec if a.tokens_per_sec > 0 else 0.0
+            want_logprobs = bool(body.get('logprobs'))
+            top_n = int(body.get('top_logprobs') or 0)
+            created = int(time.time())
+            cid = f'chatcmpl-sim-{_hash(json.dumps(body, sort_keys=True)) & 0xffffffff:08x}'
+            model = body.get('model', 'simulator')
+
+            def lp(items):
+                return [{**e, 'top_logprobs': e['top_logprobs'][:top_n]} for e in items]
+
+            if body.get('stream'):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                self.close_connection = True
+                for i, piece in enumerate(pieces):
+                    time.sleep(per_token)
+                    choice = {'index': 0, 'delta': {'content': piece} if i else {'role': 'assistant', 'content': piece},
+                              'finish_reason': None}
+                    if want_logprobs and entries is not None:
+                        choice['logprobs'] = {'content': lp(entries[i:i + 1])}
+                    chunk = {'id': cid, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                             'choices': [choice]}
+                    self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode('utf-8'))
+                    self.wfile.flush()
+                final = {'id': cid, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                         'choices': [{'index': 0, 'delta': {}, 'finish_reason': finish}]}
+                if (body.get('stream_options') or {}).get('include_usage'):
+                    final['usage'] = usage
+                self.wfile.write(f'data: {json.dumps(final)}\n\n'.encode('utf-8'))
+                self.wfile.write(b'data: [DONE]\n\n')
+                self.wfile.flush()
+                return
+
+            time.sleep(per_token * len(pieces))
+            choice = {'index': 0, 'message': {'role': 'assistant', 'content': ''.join(pieces)}, 'finish_reason': finish,
+                      'logprobs': {'content': lp(entries)} if want_logprobs and entries is not None else None}
+            self._json(200, {'id': cid, 'object': 'chat.completion', 'created': created, 'model': model,
+                             'choices': [choice], 'usage': usage})
+
+    return Handler
+
+
+class LocalSimulator:
+    """
+    Simulator served from a background thread and set as OPENAI_BASE_URL while in use.
+    Keyword arguments override the command-line defaults; by default there is no latency.
+    """
+
+    def __init__(self, **overrides):
+        args = build_parser().parse_args([])
+        args.latency_ms, args.latency_dist, args.tokens_per_sec = 0.0, 'fixed', 0.0
+        for k, v in overrides.items():
+            setattr(args, k, v)
+        self.simulator = Simulator(args)
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(self.simulator))
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def __enter__(self):
+        self.thread.start()
+        self.saved = {k: os.environ.get(k) for k in ('OPENAI_BASE_URL', 'OPENAI_API_KEY')}
+        os.environ['OPENAI_BASE_URL'] = self.base_url
+        os.environ['OPENAI_API_KEY'] = 'sim'
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+        for k, v in self.saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Local OpenAI-compatible chat completions simulator')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--seed', type=int, default=0, help='Seed for latency and fault injection')
+    parser.add_argument('--latency-ms', type=float, default=300.0, help='Mean time to first token')
+    parser.add_argument('--latency-jitter-ms', type=float, default=100.0, help='Spread for normal/lognormal latency')
+    parser.add_argument('--latency-dist', choices=['fixed', 'normal', 'lognormal', 'exponential'], default='lognormal')
+    parser.add_argument('--tokens-per-sec', type=float, default=100.0, help='Output token throughput (0 = instant)')
+    parser.add_argument('--none-rate', type=float, default=0.8, help="Fraction of sentences labeled 'none'")
+    parser.add_argument('--rate-429', type=float, default=0.0, help='Fraction of requests answered with 429')
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help='Fraction of requests that hang')
+    parser.add_argument('--timeout-seconds', type=float, default=600.0, help='How long a hanging request hangs')
+    parser.add_argument('--truncate-rate', type=float, default=0.0, help='Fraction of responses cut short')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(Simulator(args)))
+    server.daemon_threads = True
+    print(f'Simulator listening on http://{args.host}:{args.port}/v1 '
+          f'(set OPENAI_BASE_URL=http://{args.host}:{args.port}/v1)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
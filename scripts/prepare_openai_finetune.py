@@ -0,0 +1,135 @@
+import sys
+import json
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from service.analyzer import (  # noqa: E402
+    LABELS, OUTPUT_CODES, OUTPUT_JSON, build_messages, format_target, split_sentences
+)
+from validate_labels import climate_label_issues, edu_label_issues  # noqa: E402
+
+SOURCES = [
+    {'name': 'climate', 'checks': climate_label_issues,
+     'train': 'data/climate_train.csv', 'val': 'data/climate_dev.csv'},
+    {'name': 'edu', 'checks': edu_label_issues,
+     'train': 'data/edu_train.csv', 'val': 'data/edu_dev.csv'},
+]
+
+LABEL_COLUMNS = ['updated_label', 'logical_fallacies']
+
+
+def token_counter(model: str):
+    """Return a function counting tokens; falls back to ~4 chars/token without tiktoken"""
+    try:
+        import tiktoken
+        try:
+            enc = tiktoken.encoding_for_model(model)
+        except KeyError:
+            enc = tiktoken.get_encoding('o200k_base')
+        return lambda s: len(enc.encode(s))
+    except ImportError:
+        return lambda s: max(1, len(s) // 4)
+
+
+def iter_examples(path: str, checks, clean: bool, stats: dict, chunksize: int):
+    """Yield (group_key, sentences, labels) per CSV row, streaming in chunks"""
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        label_col = next((c for c in LABEL_COLUMNS if c in chunk.columns), None)
+        if label_col is None or 'source_article' not in chunk.columns:
+            print(f"  {path}: missing source_article/label columns, skipping...")
+            return
+        for _, row in chunk.iterrows():
+            if pd.isna(row['source_article']) or pd.isna(row[label_col]):
+                stats['skipped_empty'] += 1
+                continue
+            text = str(row['source_article']).strip()
+            label = str(row[label_col]).strip()
+            if not text or label not in LABELS:
+                stats['skipped_label'] += 1
+                continue
+            if checks(text.lower(), label):
+                stats['flagged'] += 1
+                if clean:
+                    continue
+            sentences = split_sentences(text)
+            if not sentences:
+                stats['skipped_empty'] += 1
+                continue
+            key = row.get('original_url')
+            key = None if pd.isna(key) else str(key)
+            yield key, sentences, [label] * len(sentences)
+
+
+def iter_paragraphs(examples, max_sentences: int):
+    """Group consecutive rows from the same article into paragraph-sized examples"""
+    cur_key = object()
+    sentences, labels = [], []
+    for key, sents, labs in examples:
+        if sentences and (key != cur_key or key is None or len(sentences) + len(sents) > max_sentences):
+            yield sentences, labels
+            sentences, labels = [], []
+        cur_key = key
+        sentences.extend(sents)
+        labels.extend(labs)
+    if sentences:
+        yield sentences, labels
+
+
+def build_record(sentences: list[str], labels: list[str], output_mode: str) -> dict:
+    text = ' '.join(sentences)
+    messages = build_messages(text, sentences, output_mode)
+    messages.append({'role': 'assistant', 'content': format_target(labels, output_mode)})
+    return {'messages': messages}
+
+
+def write_split(split: str, out_path: Path, args, count_tokens) -> dict:
+    stats = {'examples': 0, 'sentences': 0, 'tokens': 0, 'flagged': 0,
+             'skipped_empty': 0, 'skipped_label': 0}
+    with open(out_path, 'w', encoding='utf-8') as f:
+        for source in SOURCES:
+            path = source[split]
+            if not Path(path).exists():
+                print(f"  {path} not found, skipping...")
+                continue
+            examples = iter_examples(path, source['checks'], args.clean, stats, args.chunksize)
+            for sentences, labels in iter_paragraphs(examples, args.max_sentences):
+                record = build_record(sentences, labels, args.output_mode)
+                stats['tokens'] += sum(count_tokens(m['content']) for m in record['messages'])
+                stats['examples'] += 1
+                stats['sentences'] += len(sentences)
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    print(f"{split}: {stats['examples']} examples, {stats['sentences']} sentences, "
+          f"{stats['tokens']} tokens -> {out_path}")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prepare chat-format JSONL for OpenAI fine-tuning')
+    parser.add_argument('--outdir', default='openai_ft', help='Output directory for train.jsonl/val.jsonl')
+    parser.add_argument('--clean', action='store_true', help='Drop rows flagged by validate_labels checks')
+    parser.add_argument('--max-sentences', type=int, default=8, help='Max sentences per paragraph example')
+    parser.add_argument('--chunksize', type=int, default=2000, help='CSV rows read per chunk')
+    parser.add_argument('--output-mode', choices=[OUTPUT_JSON, OUTPUT_CODES], default=OUTPUT_JSON,
+                        help='Target format: JSON results or one label code per line (default json)')
+    parser.add_argument('--token-model', default='gpt-4o-mini', help='Model name used for token counting')
+    args = parser.parse_args()
+
+    outdir = Path(args.outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    count_tokens = token_counter(args.token_model)
+
+    summary = {
+        'train': write_split('train', outdir / 'train.jsonl', args, count_tokens),
+        'val': write_split('val', outdir / 'val.jsonl', args, count_tokens),
+    }
+    (outdir / 'summary.json').write_text(json.dumps(summary, indent=2), encoding='utf-8')
+    print(f"Wrote summary to {outdir / 'summary.json'}")
+
+
+if __name__ == '__main__':
+    main()
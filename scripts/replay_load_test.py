@@ -0,0 +1,181 @@
+import json
+import math
+import time
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from datetime import datetime
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+
+def parse_timestamp(value) -> float | None:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+
+
+def load_log(path: str, limit: int | None):
+    """Read recorded requests: {"timestamp": ..., "body": {...}} or AnalyzeRequest fields plus "timestamp"."""
+    entries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            ts = parse_timestamp(rec.get('timestamp', rec.get('ts')))
+            body = rec.get('body')
+            if body is None:
+                body = {k: v for k, v in rec.items() if k not in ('timestamp', 'ts')}
+            if 'text' not in body:
+                continue
+            entries.append((ts, body))
+            if limit and len(entries) >= limit:
+                break
+    return entries
+
+
+def schedule(entries, mode: str, speed: float, rate: float | None) -> list[float]:
+    """Offsets in seconds from test start at which each request is sent"""
+    if mode == 'fixed' or any(ts is None for ts, _ in entries):
+        interval = 1.0 / (rate or 1.0)
+        return [i * interval for i in range(len(entries))]
+    t0 = entries[0][0]
+    return [max(0.0, (ts - t0) / speed) for ts, _ in entries]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def send(url: str, body: dict, timeout: float, scheduled: float) -> dict:
+    """
+    POST one request. Latency is measured from its scheduled send time, so time spent
+    waiting for a free --max-inflight slot counts (open-loop); service time and how
+    late it was actually sent are reported separately.
+    """
+    data = json.dumps(body).encode('utf-8')
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            payload = json.loads(resp.read().decode('utf-8'))
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        payload, status = None, e.code
+    except Exception as e:
+        payload, status = None, type(e).__name__
+    t1 = time.perf_counter()
+    return {
+        'status': status,
+        'seconds': t1 - scheduled,
+        'service_seconds': t1 - t0,
+        'send_lag': max(0.0, t0 - scheduled),
+        'usage': (payload or {}).get('usage') or {},
+        'sentences': len((payload or {}).get('fallacies') or []),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded /analyze traffic and report latency and throughput')
+    parser.add_argument('--log', default='requests.jsonl', help='JSONL of recorded AnalyzeRequest bodies with timestamps')
+    parser.add_argument('--url', default='http://127.0.0.1:8000/analyze', help='Target /analyze URL')
+    parser.add_argument('--mode', choices=['original', 'fixed'], default='original',
+                        help='original: keep recorded spacing (divided by --speed); fixed: --rate requests/s')
+    parser.add_argument('--speed', type=float, default=1.0, help='Time compression for original pacing (2 = twice as fast)')
+    parser.add_argument('--rate', type=float, default=5.0, help='Requests per second for fixed pacing')
+    parser.add_argument('--limit', type=int, help='Replay at most this many requests')
+    parser.add_argument('--max-inflight', type=int, default=64, help='Max concurrent requests')
+    parser.add_argument('--timeout', type=float, default=120.0, help='Per-request timeout in seconds')
+    parser.add_argument('--out', default='load_test_summary.json', help='Output JSON summary file')
+    args = parser.parse_args()
+
+    entries = load_log(args.log, args.limit)
+    if not entries:
+        raise SystemExit(f'Error: no replayable requests in {args.log}')
+    offsets = schedule(entries, args.mode, args.speed, args.rate)
+
+    results = []
+    lock = threading.Lock()
+
+    def run(body, scheduled):
+        res = send(args.url, body, args.timeout, scheduled)
+        with lock:
+            results.append(res)
+
+    # Open-loop replay: requests go out on schedule whether or not earlier ones finished
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.max_inflight) as pool:
+        for (_, body), offset in zip(entries, offsets):
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(run, body, start + offset)
+    wall = time.perf_counter() - start
+
+    ok = [r for r in results if r['status'] == 200]
+    latencies = [r['seconds'] for r in ok]
+    service = [r['service_seconds'] for r in ok]
+    lags = [r['send_lag'] for r in results]
+    statuses = Counter(str(r['status']) for r in results)
+    tokens = Counter()
+    for r in ok:
+        tokens.update({k: v for k, v in r['usage'].items() if isinstance(v, (int, float))})
+
+    summary = {
+        'url': args.url,
+        'mode': args.mode,
+        'speed': args.speed if args.mode == 'original' else None,
+        'rate': args.rate if args.mode == 'fixed' else None,
+        'requests': len(results),
+        'wall_seconds': wall,
+        'throughput_rps': len(results) / wall if wall > 0 else 0.0,
+        'error_rate': 1 - len(ok) / len(results) if results else 0.0,
+        'status_counts': dict(statuses),
+        'latency_seconds': {
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'max': max(latencies) if latencies else 0.0,
+            'mean': sum(latencies) / len(latencies) if latencies else 0.0,
+        },
+        # Excludes time queued behind --max-inflight
+        'service_latency_seconds': {
+            'p50': percentile(service, 50),
+            'p95': percentile(service, 95),
+            'p99': percentile(service, 99),
+        },
+        'send_lag_seconds': {
+            'p50': percentile(lags, 50),
+            'p95': percentile(lags, 95),
+            'max': max(lags) if lags else 0.0,
+        },
+        'sentences': sum(r['sentences'] for r in ok),
+        'token_usage': dict(tokens),
+        'prompt_cache_ratio': tokens['cached_tokens'] / tokens['prompt_tokens'] if tokens['prompt_tokens'] else 0.0,
+    }
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+
+    lat = summary['latency_seconds']
+    print(f"{summary['requests']} requests in {wall:.1f}s ({summary['throughput_rps']:.2f} req/s), "
+          f"errors {summary['error_rate']:.1%}")
+    print(f"latency p50={lat['p50']:.3f}s p95={lat['p95']:.3f}s p99={lat['p99']:.3f}s (from scheduled send time)")
+    lag = summary['send_lag_seconds']
+    if lag['max'] > 0.05:
+        print(f"requests sent late: p95 {lag['p95']:.3f}s, max {lag['max']:.3f}s "
+              f"(raise --max-inflight if the client, not the server, is the bottleneck)")
+    print(f"prompt tokens served from cache: {summary['prompt_cache_ratio']:.1%}")
+    print(f"Wrote summary to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,34 @@
 import time
 import os
-import json
-from typing import List, Dict, Any
+import logging
+import re
+import threading
+import contextvars
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeout, as_completed
+from contextlib import nullcontext
+from typing import Callable, List, Dict, Any, Optional, Tuple
 
 import nltk
 from nltk.tokenize import sent_tokenize
-from openai import OpenAI
+from openai import APIConnectionError, APITimeoutError, InternalServerError, OpenAI, RateLimitError
+
+from service import metrics, tracing
+from service.batching import MicroBatcher
+from service.router import estimate_tokens, get_router
+from service.parsing import parse_codes, parse_results, predictions
+from service.prompts import (  # noqa: F401 (re-exported)
+	CODE_LABELS,
+	LABEL_CODES,
+	LABELS,
+	OUTPUT_CODES,
+	OUTPUT_JSON,
+	SYSTEM_PROMPT,
+	SYSTEM_PROMPT_CODES,
+	build_messages,
+	format_target,
+)
+from service.store import ResultStoreUnavailable, get_result_store
 
 # Ensure NLTK data
 try:
@@ -17,43 +40,16 @@ try:
 except LookupError:
 	 nltk.download('punkt', quiet=True)
 
-LABELS: List[str] = [
-	"ad hominem",
-	"ad populum",
-	"appeal to emotion",
-	"circular reasoning",
-	"equivocation",
-	"fallacy of credibility",
-	"fallacy of extension",
-	"fallacy of logic",
-	"fallacy of relevance",
-	"false causality",
-	"false dilemma",
-	"faulty generalization",
-	"intentional",
-	"miscellaneous",
-	"none",
-]
-
-SYSTEM_PROMPT = (
-	"Classify each sentence into exactly one label from the allowed set. "
-	"Use the full paragraph context. Only label a fallacy if a clear, explicit instance is present; "
-	"otherwise return 'none'. Respond ONLY in compact JSON: results=[{index,label,confidence}]. "
-	"Set confidence to a probability between 0 and 1."
-)
+logger = logging.getLogger(__name__)
 
+_RETRYABLE = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
 
-def _build_user_msg(text: str, sentences: List[str]) -> str:
-	allowed = ", ".join(LABELS)
-	numbered = "\n".join(f"{i+1}. {s}" for i, s in enumerate(sentences))
-	return (
-		f"Allowed labels: {allowed}.\n"
-		f"Paragraph: {text}\n"
-		f"Sentences (numbered):\n{numbered}\n\n"
-		"Return JSON with array 'results', each item: {index, label, confidence}. "
-		"Index is the 1-based sentence number; label is one of the allowed labels; "
-		"confidence is a probability 0..1 for the chosen label."
-	)
+
+def split_sentences(text: str) -> List[str]:
+	try:
+		return sent_tokenize(text)
+	except Exception:
+		return [s.strip() for s in text.split('.') if s.strip()]
 
 
 def _find_spans(text: str, sentences: List[str]) -> List[Dict[str, Any]]:
@@ -70,87 +66,484 @@ def _find_spans(text: str, sentences: List[str]) -> List[Dict[str, Any]]:
 	return spans
 
 
-def analyze_text(text: str, model_id: str, threshold: float = 0.6, max_tokens: int = 512) -> Dict[str, Any]:
+# Sentence end (terminal punctuation, optional closing quotes/brackets) right before a
+# paragraph break, or failing that before a single newline
+_PARAGRAPH_END = re.compile(r"[.!?][\"'\u201d\u2019)\]]*[ \t]*(?=\n[ \t]*\n)")
+_LINE_END = re.compile(r"[.!?][\"'\u201d\u2019)\]]*[ \t]*(?=\n)")
+
+
+def _split_sections(text: str, section_chars: int) -> List[Tuple[int, str]]:
 	"""
-	Analyze text with the fine-tuned OpenAI model using full-paragraph context and batching.
-	Returns a dict: {
-		input_text, elapsed_seconds, fallacies: [{fallacy_type, text, start_char, end_char, confidence}],
-		fallacy_types: [...], sentences_with_fallacies: [...]
-	}
+	Cut text into (offset, section) pieces of roughly section_chars. Cuts are made only
+	at a line break (preferably a blank line) directly after a sentence end, so headings
+	and hard-wrapped lines are never cut off from the sentence they belong to. Splitting
+	the sections then matches splitting the whole text, except in rare cases such as a
+	paragraph that ends in an abbreviation ("etc.").
 	"""
-	if not os.getenv('OPENAI_API_KEY'):
-		raise RuntimeError("OPENAI_API_KEY is not set")
+	sections = []
+	start = 0
+	while len(text) - start > section_chars:
+		m = _PARAGRAPH_END.search(text, start + section_chars) or _LINE_END.search(text, start + section_chars)
+		if m is None:
+			break
+		cut = m.end()
+		sections.append((start, text[start:cut]))
+		start = cut
+	sections.append((start, text[start:]))
+	return sections
 
-	client = OpenAI()
 
-	try:
-		sentences = sent_tokenize(text)
-	except Exception:
-		sentences = [s.strip() for s in text.split('.') if s.strip()]
+def _segment_section(section: str) -> Tuple[List[str], List[Tuple[int, int]]]:
+	"""Process-pool worker: sentences of one section and their offsets within it."""
+	sentences = split_sentences(section)
+	return sentences, [(s["start"], s["end"]) for s in _find_spans(section, sentences)]
 
-	start_time = time.perf_counter()
 
-	msg = client.chat.completions.create(
-		model=model_id,
-		temperature=0,
-		max_tokens=max_tokens,
-		messages=[
-			{"role": "system", "content": SYSTEM_PROMPT},
-			{"role": "user", "content": _build_user_msg(text, sentences)}
-		],
-		response_format={"type": "json_object"}
-	)
-	content = msg.choices[0].message.content
-	try:
-		data = json.loads(content)
-	except Exception:
-		# Fallback to first JSON object
-		start = content.find('{')
-		end = content.rfind('}')
-		if start != -1 and end != -1 and end > start:
-			data = json.loads(content[start:end+1])
-		else:
+_split_pool: Optional[ProcessPoolExecutor] = None
+_split_pool_lock = threading.Lock()
+
+
+def _segment_async(sections: List[Tuple[int, str]]) -> List[Future]:
+	"""Segment sections in a process pool (FALLACY_SPLIT_PROCESSES, default one per CPU)."""
+	global _split_pool
+	with _split_pool_lock:
+		if _split_pool is None:
+			workers = int(os.getenv("FALLACY_SPLIT_PROCESSES", "0")) or os.cpu_count() or 1
+			# spawn: forking a process that runs batcher and job threads is not safe
+			_split_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+	return [_split_pool.submit(_segment_section, section) for _, section in sections]
+
+
+class DeadlineExceeded(Exception):
+	"""The request's deadline passed before the model call could complete."""
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+	return None if deadline is None else deadline - time.perf_counter()
+
+
+def _call_model(client: OpenAI, max_retries: int = 2, deadline: Optional[float] = None, **kwargs: Any) -> Any:
+	"""
+	chat.completions.create with our own retry loop so retries are counted.
+	With a deadline (perf_counter time), each attempt's timeout is the time left and
+	no retry is started that could not finish in time.
+	"""
+	attempt = 0
+	while True:
+		remaining = _remaining(deadline)
+		if remaining is not None:
+			if remaining <= 0:
+				metrics.DEADLINE_EXCEEDED.inc()
+				raise DeadlineExceeded("deadline exceeded before model call")
+			kwargs["timeout"] = remaining
+		try:
+			with tracing.span("model_call", model=kwargs.get("model"), attempt=attempt) as record:
+				msg = client.chat.completions.create(**kwargs)
+				if record is not None:
+					record["attributes"].update(metrics.usage_dict(getattr(msg, "usage", None)))
+			metrics.MODEL_CALLS.labels(outcome="ok").inc()
+			return msg
+		except _RETRYABLE:
+			backoff = 0.5 * (2 ** attempt)
+			remaining = _remaining(deadline)
+			if remaining is not None and remaining <= backoff:
+				metrics.MODEL_CALLS.labels(outcome="error").inc()
+				metrics.DEADLINE_EXCEEDED.inc()
+				raise DeadlineExceeded("deadline exceeded during model call")
+			if attempt >= max_retries:
+				metrics.MODEL_CALLS.labels(outcome="error").inc()
+				raise
+			metrics.MODEL_RETRIES.inc()
+			time.sleep(backoff)
+			attempt += 1
+		except Exception:
+			metrics.MODEL_CALLS.labels(outcome="error").inc()
 			raise
 
-	results = data.get('results', [])
-	spans = _find_spans(text, sentences)
 
-	fallacies = []
-	for i, span in enumerate(spans):
-		label = 'none'
-		conf = 0.0
-		for item in results:
-			try:
-				idx = int(item.get('index', 0)) - 1
-			except Exception:
-				idx = -1
-			if idx == i:
-				candidate = str(item.get('label', '')).strip()
-				try:
-					conf = float(item.get('confidence', 0.0))
-				except Exception:
-					conf = 0.0
-				label = candidate if candidate in LABELS else 'none'
+def _classify(
+	client: OpenAI,
+	model_id: str,
+	text: str,
+	sentences: List[str],
+	max_tokens: int,
+	timer: metrics.StageTimer,
+	output_mode: str = OUTPUT_JSON,
+	deadline: Optional[float] = None,
+) -> Tuple[Dict[int, Tuple[str, float]], Dict[int, Dict[str, float]], Dict[str, int], int]:
+	"""
+	One model call. Returns (predictions by 0-based index, label distributions, usage,
+	items salvaged). Distributions are only available in OUTPUT_CODES mode.
+	"""
+	with timer.stage("prompt_build"):
+		messages = build_messages(text, sentences, output_mode)
+
+	if output_mode == OUTPUT_CODES:
+		extra = {"logprobs": True, "top_logprobs": 5}
+	else:
+		extra = {"response_format": {"type": "json_object"}}
+	with timer.stage("model"):
+		msg = _call_model(
+			client,
+			deadline=deadline,
+			model=model_id,
+			temperature=0,
+			max_tokens=max_tokens,
+			messages=messages,
+			**extra
+		)
+	usage = metrics.usage_dict(getattr(msg, 'usage', None))
+	metrics.record_usage(usage)
+
+	with timer.stage("parse"):
+		choice = msg.choices[0]
+		if output_mode == OUTPUT_CODES:
+			logprobs = getattr(choice, 'logprobs', None)
+			preds, dists, complete = parse_codes(
+				choice.message.content, getattr(logprobs, 'content', None), len(sentences), CODE_LABELS
+			)
+			salvaged = len(preds)
+		else:
+			items, complete = parse_results(choice.message.content)
+			preds = predictions(items, len(sentences), LABELS)
+			dists = {}
+			salvaged = len(items)
+	if not complete:
+		metrics.PARTIAL_RESPONSES.inc()
+	return preds, dists, usage, salvaged
+
+
+_batcher: Optional[MicroBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def _classify_batched(
+	model_id: str, output_mode: str, max_tokens: int, text: str, sentences: List[str]
+) -> Tuple[Dict[int, Tuple[str, float]], Dict[int, Dict[str, float]], Dict[str, int], int]:
+	return _classify(OpenAI(max_retries=0), model_id, text, sentences, max_tokens, metrics.StageTimer(), output_mode)
+
+
+def get_batcher() -> Optional[MicroBatcher]:
+	"""Micro-batcher enabled by FALLACY_BATCH_WAIT_MS > 0, else None."""
+	global _batcher
+	wait_ms = float(os.getenv("FALLACY_BATCH_WAIT_MS", "0"))
+	if wait_ms <= 0:
+		return None
+	with _batcher_lock:
+		if _batcher is None:
+			_batcher = MicroBatcher(
+				_classify_batched,
+				max_wait_ms=wait_ms,
+				max_batch_tokens=int(os.getenv("FALLACY_BATCH_TOKENS", "4000")),
+				max_batch_sentences=int(os.getenv("FALLACY_BATCH_SENTENCES", "64")),
+			)
+	return _batcher
+
+
+def _add_usage(total: Dict[str, int], usage: Dict[str, int]) -> None:
+	for k, v in usage.items():
+		total[k] = total.get(k, 0) + v
+
+
+def _chunk_ranges(count: int, chunk_sentences: Optional[int]) -> List[Tuple[int, int]]:
+	if not chunk_sentences or count <= chunk_sentences:
+		return [(0, count)]
+	return [(lo, min(lo + chunk_sentences, count)) for lo in range(0, count, chunk_sentences)]
+
+
+def _analyze_chunk(
+	client: OpenAI,
+	model_id: str,
+	text: str,
+	sentences: List[str],
+	spans: List[Dict[str, Any]],
+	lo: int,
+	hi: int,
+	max_tokens: int,
+	max_repair_rounds: int,
+	output_mode: str,
+	timer: metrics.StageTimer,
+	deadline: Optional[float] = None,
+	context: Optional[str] = None,
+) -> Tuple[Dict[int, Tuple[str, float]], Dict[int, Dict[str, float]], Dict[str, int], List[int]]:
+	"""
+	Classify sentences[lo:hi], repairing missing ones. Indices in the result are global.
+	context defaults to the text spanned by those sentences.
+	When the deadline passes, whatever was classified so far is returned and the rest
+	is reported missing.
+	"""
+	if context is None:
+		context = text[spans[lo]['start']:spans[hi - 1]['end']]
+	chunk = sentences[lo:hi]
+	tokens = estimate_tokens(context)
+
+	with tracing.span("chunk", first=lo, last=hi - 1):
+		batcher = get_batcher()
+		try:
+			remaining = _remaining(deadline)
+			if remaining is not None and remaining <= 0:
+				raise DeadlineExceeded("deadline exceeded before chunk started")
+			if batcher is not None and batcher.accepts(len(chunk), tokens):
+				# Packed with other small concurrent documents into one completion
+				with timer.stage("model"), tracing.span("batched_call"):
+					future = batcher.submit(model_id, output_mode, context, chunk, tokens, max_tokens)
+					try:
+						local_preds, local_dists, usage, salvaged = future.result(timeout=remaining)
+					except FutureTimeout:
+						raise DeadlineExceeded("deadline exceeded waiting for batched call")
+			else:
+				local_preds, local_dists, usage, salvaged = _classify(
+					client, model_id, context, chunk, max_tokens, timer, output_mode, deadline
+				)
+		except DeadlineExceeded:
+			return {}, {}, {}, list(range(lo, hi))
+		preds = {lo + i: v for i, v in local_preds.items()}
+		dists = {lo + i: v for i, v in local_dists.items()}
+		missing = [i for i in range(lo, hi) if i not in preds]
+
+		rounds = 0
+		while missing and rounds < max_repair_rounds:
+			remaining = _remaining(deadline)
+			if remaining is not None and remaining <= 0:
 				break
+			rounds += 1
+			metrics.MISSING_SENTENCES.inc(len(missing))
+			# A truncated response shows roughly how many items fit in max_tokens
+			group_size = max(8, salvaged)
+			with tracing.span("repair", round=rounds, missing=len(missing)):
+				for g in range(0, len(missing), group_size):
+					group = missing[g:g + group_size]
+					ctx_lo = max(lo, group[0] - 2)
+					ctx_hi = min(hi - 1, group[-1] + 2)
+					repair_context = text[spans[ctx_lo]['start']:spans[ctx_hi]['end']]
+					try:
+						sub_preds, sub_dists, sub_usage, salvaged = _classify(
+							client, model_id, repair_context, [sentences[i] for i in group],
+							max_tokens, timer, output_mode, deadline
+						)
+					except DeadlineExceeded:
+						break
+					_add_usage(usage, sub_usage)
+					for j, i in enumerate(group):
+						if j in sub_preds:
+							preds[i] = sub_preds[j]
+						if j in sub_dists:
+							dists[i] = sub_dists[j]
+			missing = [i for i in missing if i not in preds]
+	return preds, dists, usage, missing
+
+
+def _assemble(
+	spans: List[Dict[str, Any]],
+	preds: Dict[int, Tuple[str, float]],
+	dists: Dict[int, Dict[str, float]],
+	lo: int,
+	hi: int,
+	threshold: float,
+	label_distribution: bool,
+) -> List[Dict[str, Any]]:
+	fallacies = []
+	for i in range(lo, hi):
+		span = spans[i]
+		label, conf = preds.get(i, ('none', 0.0))
 		if conf < threshold:
 			label = 'none'
-		fallacies.append({
+		item = {
 			'fallacy_type': label,
 			'text': span['text'],
 			'start_char': span['start'],
 			'end_char': span['end'],
 			'confidence': round(conf, 4)
-		})
+		}
+		if label_distribution:
+			item['label_distribution'] = {k: round(v, 4) for k, v in dists.get(i, {}).items()}
+		if i not in preds:
+			item['unanalyzed'] = True
+		fallacies.append(item)
+	return fallacies
 
-	elapsed = time.perf_counter() - start_time
 
-	sentences_with_fallacies = [f['text'] for f in fallacies if f['fallacy_type'] != 'none']
-	fallacy_types = sorted({f['fallacy_type'] for f in fallacies if f['fallacy_type'] != 'none'})
+def analyze_text(
+	text: str,
+	model_id: Optional[str] = None,
+	threshold: float = 0.6,
+	max_tokens: int = 512,
+	max_repair_rounds: int = 2,
+	output_mode: Optional[str] = None,
+	label_distribution: bool = False,
+	latency_budget_ms: Optional[float] = None,
+	chunk_sentences: Optional[int] = None,
+	chunk_concurrency: int = 4,
+	on_chunk: Optional[Callable[[int, int, List[Dict[str, Any]]], None]] = None,
+	deadline_ms: Optional[float] = None,
+) -> Dict[str, Any]:
+	"""
+	Analyze text with the fine-tuned OpenAI model using full-paragraph context and batching.
+	Sentences missing from a truncated or malformed response are re-requested on their own,
+	up to max_repair_rounds times; any still missing are listed in missing_sentences.
+	With output_mode=OUTPUT_CODES the model emits one label code per sentence and confidence
+	comes from token logprobs; label_distribution adds per-label probabilities to each item.
+	Without output_mode, the chosen route's output_mode is used, then FALLACY_OUTPUT_MODE
+	(default OUTPUT_JSON).
+	Without model_id, the configured router picks a deployment from the document size,
+	observed per-route latency and latency_budget_ms.
+	With chunk_sentences, the document is classified in chunks of that many sentences (each
+	with its own text as context), up to chunk_concurrency at a time; on_chunk(index, total,
+	fallacies) is called as each chunk finishes.
+	Inputs of FALLACY_PARALLEL_SPLIT_CHARS or more are cut at paragraph breaks into
+	sections that are segmented in a process pool; each section's chunks are sent to
+	the model as soon as it is split, while later sections are still being segmented.
+	With deadline_ms, model timeouts, retries, repairs and chunk scheduling all work within
+	that budget (measured from the call); when it runs out the sentences classified so far
+	are returned, the rest are marked unanalyzed and deadline_exceeded is set.
+	When a result store is configured (FALLACY_RESULT_DB) the result is saved there and
+	its analysis_id returned; if saving fails the result is still returned, with
+	analysis_id None.
+	Returns a dict: {
+		input_text, elapsed_seconds, fallacies: [{fallacy_type, text, start_char, end_char, confidence}],
+		fallacy_types: [...], sentences_with_fallacies: [...], missing_sentences: [...],
+		model_id, route, deadline_exceeded, analysis_id, timings: {stage: seconds}, usage: {...}
+	}
+	"""
+	if not os.getenv('OPENAI_API_KEY'):
+		raise RuntimeError("OPENAI_API_KEY is not set")
+	if output_mode is not None and output_mode not in (OUTPUT_JSON, OUTPUT_CODES):
+		raise ValueError(f"Unknown output_mode: {output_mode}")
+
+	client = OpenAI(max_retries=0)
+	timer = metrics.StageTimer()
+
+	start_time = time.perf_counter()
+	deadline = start_time + deadline_ms / 1000.0 if deadline_ms is not None else None
+	if latency_budget_ms is None:
+		latency_budget_ms = deadline_ms
+
+	# Huge inputs are segmented section by section in a process pool; model calls for
+	# the first sections start while later ones are still being split
+	split_chars = int(os.getenv("FALLACY_PARALLEL_SPLIT_CHARS", "1000000"))
+	sections = [(0, text)]
+	if split_chars and len(text) >= split_chars:
+		sections = _split_sections(text, int(os.getenv("FALLACY_SPLIT_SECTION_CHARS", "200000")))
+	segmented = _segment_async(sections) if len(sections) > 1 else None
+	sentences: List[str] = []
+	spans: List[Dict[str, Any]] = []
+
+	def add_section(offset: int, segment: Tuple[List[str], List[Tuple[int, int]]]) -> None:
+		sec_sentences, sec_offsets = segment
+		sentences.extend(sec_sentences)
+		spans.extend(
+			{"start": offset + s, "end": offset + e, "text": t} for t, (s, e) in zip(sec_sentences, sec_offsets)
+		)
+
+	with timer.stage("tokenize"):
+		if segmented is None:
+			sentences = split_sentences(text)
+			spans = _find_spans(text, sentences)
+		else:
+			add_section(sections[0][0], segmented[0].result())
+	tracing.set_attribute("chars", len(text))
+
+	tokens = estimate_tokens(text)
+	route = None
+	router = get_router() if model_id is None else None
+	if router is not None:
+		# Until every section is split, extrapolate the sentence count from the first
+		expected = len(sentences) * len(text) // max(1, len(sections[0][1]))
+		route = router.choose(expected, tokens, latency_budget_ms)
+		model_id = route.model_id
+		tracing.set_attribute("route", route.name)
+	if model_id is None:
+		raise RuntimeError("No model_id given and no routes configured (set FALLACY_ROUTES)")
+	# An explicit output_mode from the caller wins over the route's
+	if output_mode is None:
+		output_mode = (route and route.output_mode) or os.getenv("FALLACY_OUTPUT_MODE", OUTPUT_JSON)
+	if output_mode not in (OUTPUT_JSON, OUTPUT_CODES):
+		raise ValueError(f"Unknown output_mode: {output_mode}")
+	tracing.set_attribute("model_id", model_id)
+
+	chunks: List[Tuple[int, int]] = []
+	preds: Dict[int, Tuple[str, float]] = {}
+	dists: Dict[int, Dict[str, float]] = {}
+	usage: Dict[str, int] = {}
+	missing: List[int] = []
+
+	def run(lo: int, hi: int, context: Optional[str] = None):
+		return _analyze_chunk(
+			client, model_id, text, sentences, spans, lo, hi,
+			max_tokens, max_repair_rounds, output_mode, timer, deadline, context
+		)
 
-	return {
+	def collect(index: int, lo: int, hi: int, result) -> None:
+		c_preds, c_dists, c_usage, c_missing = result
+		preds.update(c_preds)
+		dists.update(c_dists)
+		_add_usage(usage, c_usage)
+		missing.extend(c_missing)
+		if on_chunk is not None:
+			# While a huge document is still being split, the chunk total can still grow
+			on_chunk(index, len(chunks), _assemble(spans, preds, dists, lo, hi, threshold, label_distribution))
+
+	with router.track(route, tokens) if route is not None else nullcontext():
+		if segmented is None and len(_chunk_ranges(len(sentences), chunk_sentences)) == 1:
+			chunks.append((0, len(sentences)))
+			collect(0, 0, len(sentences), run(0, len(sentences), text))
+		else:
+			with ThreadPoolExecutor(max_workers=max(1, chunk_concurrency)) as pool:
+				futures = {}
+
+				def schedule(first: int, last: int) -> None:
+					# Chunks never cross a section boundary, so each can start once its section is split
+					if last <= first:
+						return
+					for lo, hi in _chunk_ranges(last - first, chunk_sentences):
+						chunks.append((first + lo, first + hi))
+						# copy_context keeps the active trace visible inside worker threads
+						future = pool.submit(contextvars.copy_context().run, run, first + lo, first + hi)
+						futures[future] = (len(chunks) - 1, first + lo, first + hi)
+
+				schedule(0, len(sentences))
+				for (offset, _), pending in zip(sections[1:], segmented[1:] if segmented else []):
+					with timer.stage("tokenize"):
+						segment = pending.result()
+					first = len(sentences)
+					add_section(offset, segment)
+					schedule(first, len(sentences))
+				for future in as_completed(futures):
+					collect(*futures[future], future.result())
+	metrics.SENTENCES.observe(len(sentences))
+	tracing.set_attribute("sentences", len(sentences))
+	missing.sort()
+
+	with timer.stage("assemble"):
+		fallacies = _assemble(spans, preds, dists, 0, len(spans), threshold, label_distribution)
+		sentences_with_fallacies = [f['text'] for f in fallacies if f['fallacy_type'] != 'none']
+		fallacy_types = sorted({f['fallacy_type'] for f in fallacies if f['fallacy_type'] != 'none'})
+
+	elapsed = time.perf_counter() - start_time
+	metrics.ANALYZE_SECONDS.observe(elapsed)
+
+	result = {
 		'input_text': text,
 		'elapsed_seconds': elapsed,
 		'fallacies': fallacies,
 		'fallacy_types': fallacy_types,
 		'sentences_with_fallacies': sentences_with_fallacies,
+		'missing_sentences': missing,
+		'model_id': model_id,
+		'route': route.name if route is not None else None,
+		'deadline_exceeded': deadline is not None and bool(missing) and time.perf_counter() >= deadline,
+		'timings': {k: round(v, 6) for k, v in timer.timings.items()},
+		'usage': usage,
 	}
+	result['analysis_id'] = None
+	# Best effort: a missing, locked or full store must not lose an analysis already paid for
+	try:
+		store = get_result_store()
+		if store is not None:
+			result['analysis_id'] = store.save(result, threshold)
+	except ResultStoreUnavailable:
+		metrics.RESULT_STORE_ERRORS.inc()
+	except Exception:
+		metrics.RESULT_STORE_ERRORS.inc()
+		logger.exception("Could not save analysis to the result store")
+	return result
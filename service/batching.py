@@ -0,0 +1,142 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from service import metrics
+
+# classify(model_id, output_mode, max_tokens, text, sentences) -> (preds, dists, usage, salvaged)
+ClassifyFn = Callable[[str, str, int, str, List[str]], Tuple[Dict[int, Any], Dict[int, Any], Dict[str, int], int]]
+
+DOC_SEPARATOR = "\n\n"
+
+
+class _Pending:
+	def __init__(self, text: str, sentences: List[str], tokens: int, max_tokens: int) -> None:
+		self.text = text
+		self.sentences = sentences
+		self.tokens = tokens
+		self.max_tokens = max_tokens
+		self.future: Future = Future()
+		self.enqueued = time.perf_counter()
+
+
+class _Lane:
+	"""Collects requests for one (model_id, output_mode) and packs them into calls."""
+
+	def __init__(self, batcher: "MicroBatcher", model_id: str, output_mode: str) -> None:
+		self.batcher = batcher
+		self.model_id = model_id
+		self.output_mode = output_mode
+		self.queue: "queue.Queue[_Pending]" = queue.Queue()
+		self._carry: Optional[_Pending] = None
+		threading.Thread(target=self._run, name=f"batcher-{model_id}", daemon=True).start()
+
+	def _collect(self) -> List[_Pending]:
+		b = self.batcher
+		first = self._carry or self.queue.get()
+		self._carry = None
+		batch = [first]
+		tokens = first.tokens
+		sentences = len(first.sentences)
+		deadline = time.perf_counter() + b.max_wait_ms / 1000.0
+		while True:
+			remaining = deadline - time.perf_counter()
+			if remaining <= 0:
+				break
+			try:
+				nxt = self.queue.get(timeout=remaining)
+			except queue.Empty:
+				break
+			if tokens + nxt.tokens > b.max_batch_tokens or sentences + len(nxt.sentences) > b.max_batch_sentences:
+				self._carry = nxt
+				break
+			batch.append(nxt)
+			tokens += nxt.tokens
+			sentences += len(nxt.sentences)
+		return batch
+
+	def _run(self) -> None:
+		while True:
+			batch = self._collect()
+			# Calls run on the pool so the lane keeps collecting while one is in flight
+			self.batcher.pool.submit(self.batcher._execute, self.model_id, self.output_mode, batch)
+
+
+class MicroBatcher:
+	"""
+	Dynamic batching of small documents: requests arriving within max_wait_ms of
+	each other for the same model are packed into one completion (documents kept
+	apart with markers, sentences numbered across the pack) up to a token and
+	sentence budget, and each caller gets back only its own predictions.
+	"""
+
+	def __init__(
+		self,
+		classify: ClassifyFn,
+		max_wait_ms: float = 10.0,
+		max_batch_tokens: int = 4000,
+		max_batch_sentences: int = 64,
+		max_concurrency: int = 8,
+		max_output_tokens: int = 4096,
+	) -> None:
+		self.classify = classify
+		self.max_wait_ms = max_wait_ms
+		self.max_batch_tokens = max_batch_tokens
+		self.max_batch_sentences = max_batch_sentences
+		self.max_output_tokens = max_output_tokens
+		self.pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="batch-call")
+		self._lanes: Dict[Tuple[str, str], _Lane] = {}
+		self._lock = threading.Lock()
+
+	def accepts(self, sentences: int, tokens: int) -> bool:
+		"""Only documents well under the budget are worth holding back for batching."""
+		return 0 < sentences <= self.max_batch_sentences // 2 and tokens <= self.max_batch_tokens // 2
+
+	def submit(self, model_id: str, output_mode: str, text: str, sentences: List[str], tokens: int, max_tokens: int) -> Future:
+		with self._lock:
+			lane = self._lanes.get((model_id, output_mode))
+			if lane is None:
+				lane = self._lanes[(model_id, output_mode)] = _Lane(self, model_id, output_mode)
+		item = _Pending(text, sentences, tokens, max_tokens)
+		lane.queue.put(item)
+		return item.future
+
+	def _execute(self, model_id: str, output_mode: str, batch: List[_Pending]) -> None:
+		now = time.perf_counter()
+		for item in batch:
+			metrics.BATCH_WAIT_SECONDS.observe(now - item.enqueued)
+		metrics.BATCH_SIZE.observe(len(batch))
+		try:
+			if len(batch) == 1:
+				item = batch[0]
+				item.future.set_result(self.classify(model_id, output_mode, item.max_tokens, item.text, item.sentences))
+				return
+
+			texts = []
+			sentences: List[str] = []
+			offsets = []
+			for k, item in enumerate(batch):
+				texts.append(f"[Document {k + 1}] {item.text}")
+				offsets.append(len(sentences))
+				sentences.extend(item.sentences)
+			max_tokens = min(sum(item.max_tokens for item in batch), self.max_output_tokens)
+			preds, dists, usage, salvaged = self.classify(
+				model_id, output_mode, max_tokens, DOC_SEPARATOR.join(texts), sentences
+			)
+
+			total = len(sentences)
+			for item, offset in zip(batch, offsets):
+				n = len(item.sentences)
+				share = n / total
+				item.future.set_result((
+					{i - offset: v for i, v in preds.items() if offset <= i < offset + n},
+					{i - offset: v for i, v in dists.items() if offset <= i < offset + n},
+					{k: int(round(v * share)) for k, v in usage.items()},
+					max(1, int(salvaged * share)),
+				))
+		except Exception as e:
+			for item in batch:
+				if not item.future.done():
+					item.future.set_exception(e)
@@ -0,0 +1,215 @@
+import json
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from service.prompts import LABELS
+
+# Compact per-document layout: one small int per sentence indexing LABELS, character
+# offsets as int32 and confidences as float32. Sentence text is not stored; it is
+# sliced from the input text when the JSON shape is needed. Record ids are stored
+# JSON-encoded so integer and string ids come back with their original type.
+LABEL_IDS: Dict[str, int] = {label: i for i, label in enumerate(LABELS)}
+NONE_ID = LABEL_IDS["none"]
+
+
+def _pyarrow():
+	try:
+		import pyarrow
+		import pyarrow.ipc
+		import pyarrow.parquet
+	except ImportError:
+		raise RuntimeError("Columnar output requires pyarrow (pip install pyarrow)")
+	return pyarrow
+
+
+class ColumnarResult:
+	"""
+	One analyzed document as parallel columns. Columns may be array.array or
+	memoryviews over Arrow buffers; the JSON shape is built lazily from them.
+	"""
+
+	__slots__ = ("id", "input_text", "model_id", "label_ids", "starts", "ends", "confidence", "missing", "error")
+
+	def __init__(
+		self,
+		label_ids: Sequence[int],
+		starts: Sequence[int],
+		ends: Sequence[int],
+		confidence: Sequence[float],
+		missing: Sequence[int] = (),
+		input_text: Optional[str] = None,
+		model_id: Optional[str] = None,
+		id: Any = None,
+		error: Optional[str] = None,
+	) -> None:
+		self.id = id
+		self.input_text = input_text
+		self.model_id = model_id
+		self.label_ids = label_ids
+		self.starts = starts
+		self.ends = ends
+		self.confidence = confidence
+		self.missing = missing
+		self.error = error
+
+	@classmethod
+	def from_result(cls, result: Dict[str, Any], id: Any = None) -> "ColumnarResult":
+		"""From an analyze_text/detect_text result dict (an unknown label is a KeyError)."""
+		fallacies = result.get("fallacies") or []
+		return cls(
+			label_ids=array("B", (LABEL_IDS[f["fallacy_type"]] for f in fallacies)),
+			starts=array("i", (f["start_char"] for f in fallacies)),
+			ends=array("i", (f["end_char"] for f in fallacies)),
+			confidence=array("f", (f.get("confidence", 0.0) for f in fallacies)),
+			missing=array("i", result.get("missing_sentences") or ()),
+			input_text=result.get("input_text"),
+			model_id=result.get("model_id"),
+			id=result.get("id", id),
+			error=result.get("error"),
+		)
+
+	def __len__(self) -> int:
+		return len(self.label_ids)
+
+	def fallacy(self, i: int) -> Dict[str, Any]:
+		start, end = self.starts[i], self.ends[i]
+		item: Dict[str, Any] = {"fallacy_type": LABELS[self.label_ids[i]]}
+		if self.input_text is not None:
+			item["text"] = self.input_text[start:end]
+		item["start_char"] = start
+		item["end_char"] = end
+		item["confidence"] = round(float(self.confidence[i]), 4)
+		return item
+
+	def iter_fallacies(self) -> Iterator[Dict[str, Any]]:
+		for i in range(len(self)):
+			yield self.fallacy(i)
+
+	def to_dict(self) -> Dict[str, Any]:
+		"""The existing JSON result shape (label distributions are not kept in columns)."""
+		if self.error is not None:
+			return {"id": self.id, "error": self.error}
+		fallacies = list(self.iter_fallacies())
+		for i in self.missing:
+			if 0 <= i < len(fallacies):
+				fallacies[i]["unanalyzed"] = True
+		out: Dict[str, Any] = {} if self.id is None else {"id": self.id}
+		if self.input_text is not None:
+			out["input_text"] = self.input_text
+		out["total_sentences"] = len(fallacies)
+		out["fallacies"] = fallacies
+		out["fallacy_types"] = sorted({LABELS[k] for k in set(self.label_ids) if k != NONE_ID})
+		if self.input_text is not None:
+			out["sentences_with_fallacies"] = [f["text"] for f in fallacies if f["fallacy_type"] != "none"]
+		out["missing_sentences"] = list(self.missing)
+		if self.model_id is not None:
+			out["model_id"] = self.model_id
+		return out
+
+
+def arrow_schema():
+	pa = _pyarrow()
+	return pa.schema([
+		("id", pa.string()),
+		("model_id", pa.string()),
+		("input_text", pa.large_string()),
+		("label_ids", pa.list_(pa.uint8())),
+		("start_char", pa.list_(pa.int32())),
+		("end_char", pa.list_(pa.int32())),
+		("confidence", pa.list_(pa.float32())),
+		("missing_sentences", pa.list_(pa.int32())),
+		("error", pa.string()),
+	])
+
+
+def to_table(results: Iterable[ColumnarResult]):
+	"""Arrow table with one row per document."""
+	pa = _pyarrow()
+	rows: Dict[str, List[Any]] = {name: [] for name in arrow_schema().names}
+	for r in results:
+		rows["id"].append(None if r.id is None else json.dumps(r.id))
+		rows["model_id"].append(r.model_id)
+		rows["input_text"].append(r.input_text)
+		rows["label_ids"].append(r.label_ids)
+		rows["start_char"].append(r.starts)
+		rows["end_char"].append(r.ends)
+		rows["confidence"].append(r.confidence)
+		rows["missing_sentences"].append(r.missing)
+		rows["error"].append(r.error)
+	return pa.table(rows, schema=arrow_schema())
+
+
+def _flat_view(values, fmt: str) -> memoryview:
+	"""Zero-copy typed view of a primitive Arrow array's data buffer."""
+	data = memoryview(values.buffers()[1]).cast("B")
+	size = array(fmt).itemsize
+	typed = data[:len(data) - len(data) % size].cast(fmt)
+	return typed[values.offset:values.offset + len(values)]
+
+
+def _decode_id(value: Optional[str]) -> Any:
+	if value is None:
+		return None
+	try:
+		return json.loads(value)
+	except ValueError:
+		# Written before ids were JSON-encoded
+		return value
+
+
+def from_table(table) -> Iterator[ColumnarResult]:
+	"""ColumnarResults backed by the table's buffers (the table must outlive them)."""
+	for batch in table.to_batches():
+		cols = {name: batch.column(name) for name in batch.schema.names}
+		flat = {}
+		for name, fmt in (("label_ids", "B"), ("start_char", "i"), ("end_char", "i"), ("confidence", "f"), ("missing_sentences", "i")):
+			lists = cols[name]
+			flat[name] = (_flat_view(lists.values, fmt), lists.offsets.to_pylist())
+		ids = [_decode_id(v) for v in cols["id"].to_pylist()]
+		model_ids = cols["model_id"].to_pylist()
+		texts = cols["input_text"].to_pylist()
+		errors = cols["error"].to_pylist()
+		for row in range(batch.num_rows):
+			sliced = {}
+			for name, (view, offsets) in flat.items():
+				sliced[name] = view[offsets[row]:offsets[row + 1]]
+			yield ColumnarResult(
+				label_ids=sliced["label_ids"],
+				starts=sliced["start_char"],
+				ends=sliced["end_char"],
+				confidence=sliced["confidence"],
+				missing=sliced["missing_sentences"],
+				input_text=texts[row],
+				model_id=model_ids[row],
+				id=ids[row],
+				error=errors[row],
+			)
+
+
+def write_file(path: str, results: Iterable[ColumnarResult], fmt: str = "parquet") -> None:
+	"""Write results as Parquet (zstd) or an Arrow IPC file."""
+	pa = _pyarrow()
+	table = to_table(results)
+	if fmt == "parquet":
+		pa.parquet.write_table(table, path, compression="zstd")
+	elif fmt == "arrow":
+		with pa.ipc.new_file(path, table.schema) as writer:
+			writer.write_table(table)
+	else:
+		raise ValueError(f"Unknown columnar format: {fmt}")
+
+
+def read_file(path: str):
+	"""
+	Arrow table from a Parquet or Arrow IPC file (Arrow files are memory-mapped).
+	The format is detected from the file's magic bytes, not its name.
+	"""
+	pa = _pyarrow()
+	with open(path, "rb") as f:
+		magic = f.read(6)
+	if magic[:4] == b"PAR1":
+		return pa.parquet.read_table(path)
+	if magic == b"ARROW1":
+		return pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+	raise ValueError(f"{path} is neither a Parquet nor an Arrow IPC file")
+
@@ -0,0 +1,303 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from service.analyzer import analyze_text
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+	id TEXT PRIMARY KEY,
+	status TEXT NOT NULL,
+	created REAL NOT NULL,
+	started REAL,
+	finished REAL,
+	request TEXT NOT NULL,
+	total_chunks INTEGER,
+	done_chunks INTEGER NOT NULL DEFAULT 0,
+	result TEXT,
+	error TEXT,
+	owner TEXT,
+	heartbeat REAL,
+	attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs(status, created);
+CREATE TABLE IF NOT EXISTS job_chunks (
+	job_id TEXT NOT NULL,
+	chunk_index INTEGER NOT NULL,
+	fallacies TEXT NOT NULL,
+	PRIMARY KEY (job_id, chunk_index)
+);
+"""
+
+
+class JobStore:
+	"""SQLite-backed job queue; safe to share between threads (one connection per call)."""
+
+	def __init__(self, path: str) -> None:
+		self.path = path
+		with self._connection() as conn:
+			conn.execute("PRAGMA journal_mode=WAL")
+			conn.executescript(_SCHEMA)
+			# Databases created before claims had owners and attempt counts
+			columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+			for column, kind in (("owner", "TEXT"), ("heartbeat", "REAL"), ("attempts", "INTEGER NOT NULL DEFAULT 0")):
+				if column not in columns:
+					conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+	def _connect(self) -> sqlite3.Connection:
+		conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+		conn.row_factory = sqlite3.Row
+		return conn
+
+	@contextmanager
+	def _connection(self) -> Iterator[sqlite3.Connection]:
+		conn = self._connect()
+		try:
+			yield conn
+		finally:
+			conn.close()
+
+	def enqueue(self, request: Dict[str, Any]) -> str:
+		job_id = uuid.uuid4().hex
+		with self._connection() as conn:
+			conn.execute(
+				"INSERT INTO jobs (id, status, created, request) VALUES (?, ?, ?, ?)",
+				(job_id, QUEUED, time.time(), json.dumps(request)),
+			)
+		return job_id
+
+	def claim(self, owner: str) -> Optional[Dict[str, Any]]:
+		"""Atomically move the oldest queued job to running under owner (one more attempt) and return it."""
+		conn = self._connect()
+		try:
+			conn.execute("BEGIN IMMEDIATE")
+			row = conn.execute(
+				"SELECT id, request FROM jobs WHERE status = ? ORDER BY created LIMIT 1", (QUEUED,)
+			).fetchone()
+			if row is None:
+				conn.execute("COMMIT")
+				return None
+			now = time.time()
+			conn.execute(
+				"UPDATE jobs SET status = ?, started = ?, owner = ?, heartbeat = ?, attempts = attempts + 1 WHERE id = ?",
+				(RUNNING, now, owner, now, row["id"]),
+			)
+			conn.execute("COMMIT")
+			return {"id": row["id"], "request": json.loads(row["request"])}
+		except Exception:
+			conn.execute("ROLLBACK")
+			raise
+		finally:
+			conn.close()
+
+	def heartbeat(self, owner: str) -> None:
+		"""Mark every job owner is running as still alive."""
+		with self._connection() as conn:
+			conn.execute("UPDATE jobs SET heartbeat = ? WHERE status = ? AND owner = ?", (time.time(), RUNNING, owner))
+
+	def requeue_stale(self, stale_after: float, max_attempts: int = 3) -> int:
+		"""
+		Running jobs whose owner has not sent a heartbeat for stale_after seconds (a
+		crashed or killed process) go back to the queue; their chunks are redone.
+		A job that has already been claimed max_attempts times is failed instead, so
+		an input that keeps crashing its worker is not retried forever.
+		Jobs of live processes, including other API workers, are left alone.
+		"""
+		now = time.time()
+		cutoff = now - stale_after
+		conn = self._connect()
+		try:
+			conn.execute("BEGIN IMMEDIATE")
+			stale = "status = ? AND (heartbeat IS NULL OR heartbeat < ?)"
+			conn.execute(f"DELETE FROM job_chunks WHERE job_id IN (SELECT id FROM jobs WHERE {stale})", (RUNNING, cutoff))
+			conn.execute(
+				"UPDATE jobs SET status = ?, finished = ?, owner = NULL, heartbeat = NULL, "
+				"error = 'Worker stopped responding on every attempt (' || attempts || ')' "
+				f"WHERE {stale} AND attempts >= ?",
+				(FAILED, now, RUNNING, cutoff, max_attempts),
+			)
+			cur = conn.execute(
+				"UPDATE jobs SET status = ?, started = NULL, total_chunks = NULL, done_chunks = 0, owner = NULL, "
+				f"heartbeat = NULL WHERE {stale}",
+				(QUEUED, RUNNING, cutoff),
+			)
+			conn.execute("COMMIT")
+			return cur.rowcount
+		except Exception:
+			conn.execute("ROLLBACK")
+			raise
+		finally:
+			conn.close()
+
+	def save_chunk(self, job_id: str, owner: str, index: int, total: int, fallacies: List[Dict[str, Any]]) -> bool:
+		"""Record a finished chunk; False (nothing written) if owner no longer holds the job."""
+		conn = self._connect()
+		try:
+			conn.execute("BEGIN IMMEDIATE")
+			held = conn.execute(
+				"SELECT 1 FROM jobs WHERE id = ? AND status = ? AND owner = ?", (job_id, RUNNING, owner)
+			).fetchone()
+			if held is None:
+				conn.execute("ROLLBACK")
+				return False
+			conn.execute(
+				"INSERT OR REPLACE INTO job_chunks (job_id, chunk_index, fallacies) VALUES (?, ?, ?)",
+				(job_id, index, json.dumps(fallacies)),
+			)
+			conn.execute(
+				"UPDATE jobs SET total_chunks = ?, heartbeat = ?, done_chunks = "
+				"(SELECT COUNT(*) FROM job_chunks WHERE job_id = ?) WHERE id = ?",
+				(total, time.time(), job_id, job_id),
+			)
+			conn.execute("COMMIT")
+			return True
+		except Exception:
+			conn.execute("ROLLBACK")
+			raise
+		finally:
+			conn.close()
+
+	def complete(self, job_id: str, owner: str, result: Dict[str, Any]) -> bool:
+		with self._connection() as conn:
+			cur = conn.execute(
+				"UPDATE jobs SET status = ?, finished = ?, result = ? WHERE id = ? AND status = ? AND owner = ?",
+				(DONE, time.time(), json.dumps(result), job_id, RUNNING, owner),
+			)
+			return cur.rowcount == 1
+
+	def fail(self, job_id: str, owner: str, error: str) -> bool:
+		with self._connection() as conn:
+			cur = conn.execute(
+				"UPDATE jobs SET status = ?, finished = ?, error = ? WHERE id = ? AND status = ? AND owner = ?",
+				(FAILED, time.time(), error, job_id, RUNNING, owner),
+			)
+			return cur.rowcount == 1
+
+	def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+		with self._connection() as conn:
+			row = conn.execute(
+				"SELECT id, status, created, started, finished, total_chunks, done_chunks, attempts, error "
+				"FROM jobs WHERE id = ?",
+				(job_id,),
+			).fetchone()
+		if row is None:
+			return None
+		return dict(row)
+
+	def results(self, job_id: str) -> Optional[Dict[str, Any]]:
+		"""Final result when done; otherwise the fallacies of the chunks finished so far."""
+		with self._connection() as conn:
+			row = conn.execute("SELECT status, result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+			if row is None:
+				return None
+			if row["status"] == DONE:
+				return {"status": DONE, "complete": True, **json.loads(row["result"])}
+			chunks = conn.execute(
+				"SELECT fallacies FROM job_chunks WHERE job_id = ? ORDER BY chunk_index", (job_id,)
+			).fetchall()
+		fallacies = [f for chunk in chunks for f in json.loads(chunk["fallacies"])]
+		return {"status": row["status"], "complete": False, "fallacies": fallacies}
+
+
+class JobWorkers:
+	"""
+	Background threads that claim queued jobs and run the analyzer chunk by chunk.
+	Claims carry this instance's owner id and are kept alive by a heartbeat thread;
+	any instance may requeue jobs whose heartbeat is older than stale_after seconds,
+	up to max_attempts claims per job.
+	"""
+
+	def __init__(
+		self,
+		store: JobStore,
+		workers: int = 2,
+		chunk_sentences: int = 50,
+		poll_interval: float = 0.5,
+		stale_after: float = 60.0,
+		max_attempts: int = 3,
+	) -> None:
+		self.store = store
+		self.workers = workers
+		self.chunk_sentences = chunk_sentences
+		self.poll_interval = poll_interval
+		self.stale_after = stale_after
+		self.max_attempts = max_attempts
+		self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+		self._stop = threading.Event()
+		self._threads: List[threading.Thread] = []
+		self._last_reap = 0.0
+		self._reap_lock = threading.Lock()
+
+	def start(self) -> None:
+		for i in range(self.workers):
+			t = threading.Thread(target=self._loop, name=f"job-worker-{i}", daemon=True)
+			t.start()
+			self._threads.append(t)
+		t = threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True)
+		t.start()
+		self._threads.append(t)
+
+	def stop(self, timeout: float = 5.0) -> None:
+		self._stop.set()
+		for t in self._threads:
+			t.join(timeout)
+
+	def _heartbeat_loop(self) -> None:
+		while not self._stop.wait(self.stale_after / 4):
+			try:
+				self.store.heartbeat(self.owner)
+			except Exception:
+				pass
+
+	def _reap(self) -> None:
+		"""Requeue stale claims, at most once per half stale period per instance."""
+		with self._reap_lock:
+			now = time.time()
+			if now - self._last_reap < self.stale_after / 2:
+				return
+			self._last_reap = now
+		self.store.requeue_stale(self.stale_after, self.max_attempts)
+
+	def _loop(self) -> None:
+		while not self._stop.is_set():
+			try:
+				self._reap()
+				job = self.store.claim(self.owner)
+			except Exception:
+				job = None
+			if job is None:
+				self._stop.wait(self.poll_interval)
+				continue
+			self._run(job)
+
+	def _run(self, job: Dict[str, Any]) -> None:
+		job_id = job["id"]
+		req = job["request"]
+		try:
+			result = analyze_text(
+				req["text"],
+				model_id=req.get("model_id"),
+				threshold=req.get("threshold", 0.6),
+				output_mode=req.get("output_mode"),
+				label_distribution=req.get("label_distribution", False),
+				latency_budget_ms=req.get("latency_budget_ms"),
+				deadline_ms=req.get("deadline_ms"),
+				chunk_sentences=req.get("chunk_sentences") or self.chunk_sentences,
+				on_chunk=lambda index, total, fallacies: self.store.save_chunk(job_id, self.owner, index, total, fallacies),
+			)
+			# The request row already holds the input text
+			result.pop("input_text", None)
+			self.store.complete(job_id, self.owner, result)
+		except Exception as e:
+			self.store.fail(job_id, self.owner, str(e))
@@ -0,0 +1,141 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+from service import tracing
+
+STAGES = ("tokenize", "prompt_build", "model", "parse", "assemble")
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_SECONDS = Histogram(
+	"fallacy_stage_seconds",
+	"Time spent in each analysis stage",
+	["stage"],
+	buckets=_LATENCY_BUCKETS,
+)
+ANALYZE_SECONDS = Histogram(
+	"fallacy_analyze_seconds",
+	"End-to-end analyze_text latency",
+	buckets=_LATENCY_BUCKETS,
+)
+SENTENCES = Histogram(
+	"fallacy_sentences_per_request",
+	"Sentences per analyzed document",
+	buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000),
+)
+MODEL_CALLS = Counter(
+	"fallacy_model_calls_total",
+	"Chat completion calls by outcome",
+	["outcome"],
+)
+MODEL_RETRIES = Counter(
+	"fallacy_model_retries_total",
+	"Chat completion calls retried after a transient error",
+)
+DEADLINE_EXCEEDED = Counter(
+	"fallacy_deadline_exceeded_total",
+	"Model calls abandoned because the request deadline ran out",
+)
+PARTIAL_RESPONSES = Counter(
+	"fallacy_partial_responses_total",
+	"Model responses whose results array was truncated or malformed",
+)
+RESULT_STORE_ERRORS = Counter(
+	"fallacy_result_store_errors_total",
+	"Analyses that could not be saved to the result store",
+)
+MISSING_SENTENCES = Counter(
+	"fallacy_missing_sentences_total",
+	"Sentences absent from a model response and re-requested",
+)
+TOKENS = Counter(
+	"fallacy_model_tokens_total",
+	"Tokens reported in completion usage",
+	["kind"],
+)
+ROUTE_REQUESTS = Counter(
+	"fallacy_route_requests_total",
+	"Documents assigned to each model route",
+	["route"],
+)
+ROUTE_IN_FLIGHT = Gauge(
+	"fallacy_route_in_flight",
+	"Documents currently being analyzed per model route",
+	["route"],
+)
+ROUTE_SECONDS = Histogram(
+	"fallacy_route_seconds",
+	"Model time per document per route",
+	["route", "outcome"],
+	buckets=_LATENCY_BUCKETS,
+)
+BATCH_SIZE = Histogram(
+	"fallacy_batch_documents",
+	"Documents packed into one micro-batched model call",
+	buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+BATCH_WAIT_SECONDS = Histogram(
+	"fallacy_batch_wait_seconds",
+	"Time a document waited in the micro-batcher before its call started",
+	buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+PROMPT_CACHE_RATIO = Histogram(
+	"fallacy_prompt_cache_ratio",
+	"Fraction of prompt tokens served from the provider's prompt-prefix cache per call",
+	buckets=(0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0),
+)
+
+
+class StageTimer:
+	"""Accumulates wall time per stage, mirrors it into STAGE_SECONDS and the active trace."""
+
+	def __init__(self) -> None:
+		self.timings: Dict[str, float] = {}
+		self._lock = threading.Lock()
+
+	@contextmanager
+	def stage(self, name: str) -> Iterator[None]:
+		t0 = time.perf_counter()
+		try:
+			with tracing.span(name):
+				yield
+		finally:
+			elapsed = time.perf_counter() - t0
+			with self._lock:
+				self.timings[name] = self.timings.get(name, 0.0) + elapsed
+			STAGE_SECONDS.labels(stage=name).observe(elapsed)
+
+
+def usage_dict(usage: Any) -> Dict[str, int]:
+	"""Normalize an OpenAI usage block (object or dict) to plain ints."""
+	if usage is None:
+		return {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+	get = usage.get if isinstance(usage, dict) else (lambda k, d=None: getattr(usage, k, d))
+	details = get("prompt_tokens_details")
+	if details is None:
+		cached = 0
+	elif isinstance(details, dict):
+		cached = details.get("cached_tokens") or 0
+	else:
+		cached = getattr(details, "cached_tokens", 0) or 0
+	return {
+		"prompt_tokens": int(get("prompt_tokens", 0) or 0),
+		"completion_tokens": int(get("completion_tokens", 0) or 0),
+		"cached_tokens": int(cached),
+	}
+
+
+def record_usage(usage: Dict[str, int]) -> None:
+	TOKENS.labels(kind="prompt").inc(usage["prompt_tokens"])
+	TOKENS.labels(kind="completion").inc(usage["completion_tokens"])
+	TOKENS.labels(kind="cached").inc(usage["cached_tokens"])
+	if usage["prompt_tokens"]:
+		PROMPT_CACHE_RATIO.observe(usage["cached_tokens"] / usage["prompt_tokens"])
+
+
+def render() -> bytes:
+	return generate_latest()
@@ -0,0 +1,138 @@
+import json
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+_DECODER = json.JSONDecoder()
+_SKIP = " \t\r\n,"
+# Line numbering and punctuation a model may put before a label code ("1. A", "- B")
+_LINE_PREFIX = " \t\r0123456789.:)-*#"
+
+
+def parse_results(content: str) -> Tuple[List[Dict[str, Any]], bool]:
+	"""
+	Extract the items of the model's `results` array.
+	Returns (items, complete). When the output is truncated or malformed, every
+	item object that decodes on its own is still returned and complete is False.
+	"""
+	content = content or ""
+	try:
+		data = json.loads(content)
+		items = data.get("results", []) if isinstance(data, dict) else data
+		if isinstance(items, list):
+			return [item for item in items if isinstance(item, dict)], True
+	except ValueError:
+		pass
+
+	key = content.find('"results"')
+	pos = content.find("[", key if key != -1 else 0)
+	if pos == -1:
+		return [], False
+	pos += 1
+	items: List[Dict[str, Any]] = []
+	skipped = False
+	n = len(content)
+	while pos < n:
+		while pos < n and content[pos] in _SKIP:
+			pos += 1
+		if pos >= n:
+			break
+		if content[pos] == "]":
+			return items, not skipped
+		try:
+			obj, pos = _DECODER.raw_decode(content, pos)
+		except ValueError:
+			# Skip a malformed item and resync on the next object
+			skipped = True
+			nxt = content.find("{", pos + 1)
+			if nxt == -1:
+				break
+			pos = nxt
+			continue
+		if isinstance(obj, dict):
+			items.append(obj)
+	return items, False
+
+
+def predictions(items: List[Dict[str, Any]], count: int, labels: List[str]) -> Dict[int, Tuple[str, float]]:
+	"""Map 0-based sentence index -> (label, confidence); first item per index wins."""
+	out: Dict[int, Tuple[str, float]] = {}
+	for item in items:
+		try:
+			idx = int(item.get("index", 0)) - 1
+		except Exception:
+			continue
+		if not 0 <= idx < count or idx in out:
+			continue
+		label = str(item.get("label", "")).strip()
+		try:
+			conf = float(item.get("confidence", 0.0))
+		except Exception:
+			conf = 0.0
+		out[idx] = (label if label in labels else "none", conf)
+	return out
+
+
+def _field(obj: Any, name: str, default: Any = None) -> Any:
+	if isinstance(obj, dict):
+		return obj.get(name, default)
+	return getattr(obj, name, default)
+
+
+def parse_codes(
+	content: str,
+	logprob_tokens: Optional[List[Any]],
+	count: int,
+	code_labels: Dict[str, str],
+) -> Tuple[Dict[int, Tuple[str, float]], Dict[int, Dict[str, float]], bool]:
+	"""
+	Parse one-code-per-line output. With token logprobs, confidence is the
+	probability of the code token and the distribution sums the top alternatives
+	per label. Returns (predictions, distributions, complete).
+	"""
+	preds: Dict[int, Tuple[str, float]] = {}
+	dists: Dict[int, Dict[str, float]] = {}
+
+	if not logprob_tokens:
+		# No logprobs: labels only, so confidence cannot be estimated
+		lines = [line.strip() for line in (content or "").splitlines() if line.strip()]
+		for i, line in enumerate(lines[:count]):
+			code = next((w for w in (w.strip(_LINE_PREFIX) for w in line.split()) if w), "")
+			if code in code_labels:
+				preds[i] = (code_labels[code], 1.0)
+		return preds, dists, len(lines) >= count
+
+	# Same reading as above, token by token: the code is the first piece of a line that
+	# is not numbering or punctuation, and every non-empty line counts as one sentence
+	idx = 0
+	line_text = False
+	line_read = False
+	for tok in logprob_tokens:
+		parts = (_field(tok, "token") or "").split("\n")
+		for k, part in enumerate(parts):
+			if k > 0:
+				if line_text and not line_read:
+					idx += 1
+				line_text = line_read = False
+			if line_read or not part.strip():
+				continue
+			line_text = True
+			code = part.strip(_LINE_PREFIX)
+			if not code:
+				continue
+			line_read = True
+			if idx < count and code in code_labels:
+				label = code_labels[code]
+				conf = math.exp(_field(tok, "logprob", float("-inf")))
+				dist: Dict[str, float] = {}
+				for alt in _field(tok, "top_logprobs") or []:
+					alt_code = (_field(alt, "token") or "").strip()
+					if alt_code in code_labels:
+						alt_label = code_labels[alt_code]
+						dist[alt_label] = dist.get(alt_label, 0.0) + math.exp(_field(alt, "logprob", float("-inf")))
+				dist.setdefault(label, conf)
+				preds[idx] = (label, conf)
+				dists[idx] = dist
+			idx += 1
+	if line_text and not line_read:
+		idx += 1
+	return preds, dists, idx >= count
@@ -0,0 +1,101 @@
+import json
+from typing import Dict, List
+
+# Label set and prompt layout shared by the API, the CLI and fine-tune data prep.
+# Kept free of heavy imports so lightweight tools can use it.
+
+LABELS: List[str] = [
+	"ad hominem",
+	"ad populum",
+	"appeal to emotion",
+	"circular reasoning",
+	"equivocation",
+	"fallacy of credibility",
+	"fallacy of extension",
+	"fallacy of logic",
+	"fallacy of relevance",
+	"false causality",
+	"false dilemma",
+	"faulty generalization",
+	"intentional",
+	"miscellaneous",
+	"none",
+]
+
+# Single-letter codes for OUTPUT_CODES mode; each is one token for OpenAI tokenizers
+LABEL_CODES: Dict[str, str] = {label: chr(ord("A") + i) for i, label in enumerate(LABELS)}
+CODE_LABELS: Dict[str, str] = {code: label for label, code in LABEL_CODES.items()}
+
+OUTPUT_JSON = "json"
+OUTPUT_CODES = "codes"
+
+SYSTEM_PROMPT = (
+	"Classify each sentence into exactly one label from the allowed set. "
+	"Use the full paragraph context. Only label a fallacy if a clear, explicit instance is present; "
+	"otherwise return 'none'. Respond ONLY in compact JSON: results=[{index,label,confidence}]. "
+	"Set confidence to a probability between 0 and 1."
+)
+
+
+SYSTEM_PROMPT_CODES = (
+	"Classify each sentence into exactly one label from the allowed set. "
+	"Use the full paragraph context. Only label a fallacy if a clear, explicit instance is present; "
+	f"otherwise return '{LABEL_CODES['none']}' (none). Respond ONLY with one label code per line, "
+	"one line per sentence, in sentence order."
+)
+
+
+# Everything that does not depend on the document lives in the system message, so
+# every request shares one byte-identical prefix. That prefix is only ~210 tokens,
+# below OpenAI's 1024-token minimum for prompt caching, so it yields no cache hits
+# until it grows past that (e.g. with label definitions or examples).
+_PREFIX_JSON = (
+	f"{SYSTEM_PROMPT}\n\n"
+	f"Allowed labels: {', '.join(LABELS)}.\n"
+	"Return JSON with array 'results', each item: {index, label, confidence}. "
+	"Index is the 1-based sentence number; label is one of the allowed labels; "
+	"confidence is a probability 0..1 for the chosen label.\n"
+	"The user message gives the paragraph, then its sentences numbered from 1."
+)
+
+_PREFIX_CODES = (
+	f"{SYSTEM_PROMPT_CODES}\n\n"
+	f"Label codes: {', '.join(f'{code}={label}' for label, code in LABEL_CODES.items())}.\n"
+	"Return one line per sentence, line i holding only the code for sentence i.\n"
+	"The user message gives the paragraph, then its sentences numbered from 1."
+)
+
+
+def _build_user_msg(text: str, sentences: List[str]) -> str:
+	numbered = "\n".join(f"{i+1}. {s}" for i, s in enumerate(sentences))
+	return (
+		f"Paragraph: {text}\n"
+		f"Sentences (numbered):\n{numbered}\n"
+	)
+
+
+def _build_user_msg_codes(text: str, sentences: List[str]) -> str:
+	return _build_user_msg(text, sentences) + f"\nReturn exactly {len(sentences)} lines."
+
+
+def build_messages(text: str, sentences: List[str], output_mode: str = OUTPUT_JSON) -> List[Dict[str, str]]:
+	"""Chat messages for one paragraph; shared by inference and fine-tune data prep."""
+	if output_mode == OUTPUT_CODES:
+		return [
+			{"role": "system", "content": _PREFIX_CODES},
+			{"role": "user", "content": _build_user_msg_codes(text, sentences)}
+		]
+	return [
+		{"role": "system", "content": _PREFIX_JSON},
+		{"role": "user", "content": _build_user_msg(text, sentences)}
+	]
+
+
+def format_target(labels: List[str], output_mode: str = OUTPUT_JSON) -> str:
+	"""Expected assistant reply for gold labels, in the same format build_messages asks for."""
+	if output_mode == OUTPUT_CODES:
+		return "\n".join(LABEL_CODES[label] for label in labels)
+	return json.dumps({"results": [
+		{"index": i + 1, "label": label, "confidence": 1.0}
+		for i, label in enumerate(labels)
+	]}, separators=(",", ":"))
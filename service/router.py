@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from service import metrics
+
+
+def estimate_tokens(text: str) -> int:
+	"""Rough prompt size: ~4 chars/token for the paragraph plus sentence list, plus instructions."""
+	return (2 * len(text)) // 4 + 200
+
+
+class Route:
+	"""One model deployment and the document sizes it should serve."""
+
+	def __init__(
+		self,
+		name: str,
+		model_id: str,
+		max_sentences: Optional[int] = None,
+		max_tokens: Optional[int] = None,
+		max_concurrency: Optional[int] = None,
+		output_mode: Optional[str] = None,
+		ms_per_1k_tokens: float = 1000.0,
+	) -> None:
+		self.name = name
+		self.model_id = model_id
+		self.max_sentences = max_sentences
+		self.max_tokens = max_tokens
+		self.max_concurrency = max_concurrency
+		self.output_mode = output_mode
+		# EWMA of observed latency per prompt token, seeded from config
+		self.ms_per_token = ms_per_1k_tokens / 1000.0
+		self.in_flight = 0
+
+	def fits(self, sentences: int, tokens: int) -> bool:
+		if self.max_sentences is not None and sentences > self.max_sentences:
+			return False
+		if self.max_tokens is not None and tokens > self.max_tokens:
+			return False
+		return True
+
+	def saturated(self) -> bool:
+		return self.max_concurrency is not None and self.in_flight >= self.max_concurrency
+
+	def predict_ms(self, tokens: int) -> float:
+		load = 1.0
+		if self.max_concurrency:
+			load += self.in_flight / self.max_concurrency
+		return self.ms_per_token * tokens * load
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {
+			"name": self.name,
+			"model_id": self.model_id,
+			"max_sentences": self.max_sentences,
+			"max_tokens": self.max_tokens,
+			"max_concurrency": self.max_concurrency,
+			"in_flight": self.in_flight,
+			"ms_per_1k_tokens": round(self.ms_per_token * 1000, 2),
+		}
+
+
+class Router:
+	"""
+	Picks a route per document. Routes are ordered smallest/fastest first; the first
+	route whose limits fit the document and that is not saturated wins, unless its
+	predicted latency exceeds the caller's budget, in which case the fastest fitting
+	route is used instead.
+	"""
+
+	def __init__(self, routes: List[Route], alpha: float = 0.2) -> None:
+		if not routes:
+			raise ValueError("Router needs at least one route")
+		self.routes = routes
+		self.alpha = alpha
+		self._lock = threading.Lock()
+
+	def choose(self, sentences: int, tokens: int, latency_budget_ms: Optional[float] = None) -> Route:
+		with self._lock:
+			fitting = [r for r in self.routes if r.fits(sentences, tokens)] or [self.routes[-1]]
+			available = [r for r in fitting if not r.saturated()] or fitting
+			choice = available[0]
+			if latency_budget_ms is not None and choice.predict_ms(tokens) > latency_budget_ms:
+				choice = min(available, key=lambda r: r.predict_ms(tokens))
+		metrics.ROUTE_REQUESTS.labels(route=choice.name).inc()
+		return choice
+
+	@contextmanager
+	def track(self, route: Route, tokens: int) -> Iterator[None]:
+		"""Count the call as in flight and fold its latency into the route's estimate."""
+		with self._lock:
+			route.in_flight += 1
+		metrics.ROUTE_IN_FLIGHT.labels(route=route.name).inc()
+		t0 = time.perf_counter()
+		ok = False
+		try:
+			yield
+			ok = True
+		finally:
+			elapsed = time.perf_counter() - t0
+			with self._lock:
+				route.in_flight -= 1
+				if ok:
+					observed = elapsed * 1000 / max(tokens, 1)
+					route.ms_per_token += self.alpha * (observed - route.ms_per_token)
+			metrics.ROUTE_IN_FLIGHT.labels(route=route.name).dec()
+			metrics.ROUTE_SECONDS.labels(route=route.name, outcome="ok" if ok else "error").observe(elapsed)
+
+	def snapshot(self) -> List[Dict[str, Any]]:
+		with self._lock:
+			return [r.to_dict() for r in self.routes]
+
+
+_router: Optional[Router] = None
+_router_loaded = False
+
+
+def load_routes(spec: str) -> List[Route]:
+	"""Routes from a JSON list (inline or a file path) of Route keyword arguments."""
+	if os.path.exists(spec):
+		with open(spec, "r", encoding="utf-8") as f:
+			spec = f.read()
+	return [Route(**item) for item in json.loads(spec)]
+
+
+def get_router() -> Optional[Router]:
+	"""Router configured by FALLACY_ROUTES, or None when routing is not configured."""
+	global _router, _router_loaded
+	if not _router_loaded:
+		spec = os.getenv("FALLACY_ROUTES")
+		_router = Router(load_routes(spec)) if spec else None
+		_router_loaded = True
+	return _router
+
+
+def set_router(router: Optional[Router]) -> None:
+	global _router, _router_loaded
+	_router = router
+	_router_loaded = True
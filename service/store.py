@@ -0,0 +1,287 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# After a failed open, requests fail fast for this long before the store is retried
+_STORE_RETRY_SECONDS = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+	id TEXT PRIMARY KEY,
+	created REAL NOT NULL,
+	model_id TEXT,
+	route TEXT,
+	threshold REAL,
+	elapsed_seconds REAL,
+	sentence_count INTEGER NOT NULL,
+	fallacy_types TEXT NOT NULL,
+	input_text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS analyses_created ON analyses(created);
+CREATE INDEX IF NOT EXISTS analyses_model_created ON analyses(model_id, created);
+CREATE TABLE IF NOT EXISTS sentences (
+	id INTEGER PRIMARY KEY,
+	analysis_id TEXT NOT NULL REFERENCES analyses(id),
+	sentence_index INTEGER NOT NULL,
+	label TEXT NOT NULL,
+	confidence REAL NOT NULL,
+	start_char INTEGER NOT NULL,
+	end_char INTEGER NOT NULL,
+	text TEXT NOT NULL,
+	model_id TEXT,
+	created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sentences_analysis ON sentences(analysis_id, sentence_index);
+CREATE INDEX IF NOT EXISTS sentences_label_confidence ON sentences(label, confidence);
+CREATE INDEX IF NOT EXISTS sentences_label_created ON sentences(label, created);
+CREATE INDEX IF NOT EXISTS sentences_model_created ON sentences(model_id, created);
+"""
+
+# External-content FTS index over sentences.text, keyed by sentences.id
+_FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS sentences_fts USING fts5(text, content='sentences', content_rowid='id')"
+
+
+class ResultStoreUnavailable(RuntimeError):
+	"""The configured result store could not be opened (already logged)."""
+
+
+@contextmanager
+def _search_errors(q: Optional[str]) -> Iterator[None]:
+	"""A malformed FTS query is the caller's mistake: surface it as ValueError."""
+	try:
+		yield
+	except sqlite3.OperationalError as e:
+		if q:
+			raise ValueError(f"Invalid search query {q!r}: {e}") from e
+		raise
+
+
+class ResultStore:
+	"""
+	SQLite store of finished analyses: one row per document and one per sentence,
+	indexed by label, confidence, model_id and time, with full-text search over
+	sentence text (FTS5 when the SQLite build has it, LIKE otherwise).
+	"""
+
+	def __init__(self, path: str) -> None:
+		self.path = path
+		with self._connection() as conn:
+			conn.execute("PRAGMA journal_mode=WAL")
+			conn.executescript(_SCHEMA)
+			try:
+				conn.execute(_FTS_SCHEMA)
+				self.fts = True
+			except sqlite3.OperationalError:
+				self.fts = False
+
+	def _connect(self) -> sqlite3.Connection:
+		conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+		conn.row_factory = sqlite3.Row
+		return conn
+
+	@contextmanager
+	def _connection(self) -> Iterator[sqlite3.Connection]:
+		conn = self._connect()
+		try:
+			yield conn
+		finally:
+			conn.close()
+
+	def save(self, result: Dict[str, Any], threshold: Optional[float] = None) -> str:
+		"""Store one analyze_text result and return its analysis id."""
+		analysis_id = uuid.uuid4().hex
+		created = time.time()
+		model_id = result.get("model_id")
+		fallacies = result.get("fallacies") or []
+		conn = self._connect()
+		try:
+			conn.execute("BEGIN IMMEDIATE")
+			conn.execute(
+				"INSERT INTO analyses (id, created, model_id, route, threshold, elapsed_seconds, sentence_count, "
+				"fallacy_types, input_text) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+				(
+					analysis_id, created, model_id, result.get("route"), threshold, result.get("elapsed_seconds"),
+					len(fallacies), json.dumps(result.get("fallacy_types") or []), result.get("input_text") or "",
+				),
+			)
+			for i, f in enumerate(fallacies):
+				cur = conn.execute(
+					"INSERT INTO sentences (analysis_id, sentence_index, label, confidence, start_char, end_char, "
+					"text, model_id, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+					(
+						analysis_id, i, f["fallacy_type"], f.get("confidence", 0.0), f["start_char"], f["end_char"],
+						f["text"], model_id, created,
+					),
+				)
+				if self.fts:
+					conn.execute("INSERT INTO sentences_fts (rowid, text) VALUES (?, ?)", (cur.lastrowid, f["text"]))
+			conn.execute("COMMIT")
+		except Exception:
+			conn.execute("ROLLBACK")
+			raise
+		finally:
+			conn.close()
+		return analysis_id
+
+	def get(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+		with self._connection() as conn:
+			row = conn.execute("SELECT * FROM analyses WHERE id = ?", (analysis_id,)).fetchone()
+			if row is None:
+				return None
+			sentences = conn.execute(
+				"SELECT label, confidence, start_char, end_char, text FROM sentences "
+				"WHERE analysis_id = ? ORDER BY sentence_index",
+				(analysis_id,),
+			).fetchall()
+		analysis = dict(row)
+		analysis["fallacy_types"] = json.loads(analysis["fallacy_types"])
+		analysis["fallacies"] = [
+			{
+				"fallacy_type": s["label"],
+				"text": s["text"],
+				"start_char": s["start_char"],
+				"end_char": s["end_char"],
+				"confidence": s["confidence"],
+			}
+			for s in sentences
+		]
+		return analysis
+
+	def _sentence_filters(
+		self,
+		label: Optional[str],
+		min_confidence: Optional[float],
+		max_confidence: Optional[float],
+		model_id: Optional[str],
+		since: Optional[float],
+		until: Optional[float],
+		q: Optional[str],
+	) -> Tuple[List[str], List[Any]]:
+		where: List[str] = []
+		params: List[Any] = []
+		if label is not None:
+			where.append("s.label = ?")
+			params.append(label)
+		if min_confidence is not None:
+			where.append("s.confidence >= ?")
+			params.append(min_confidence)
+		if max_confidence is not None:
+			where.append("s.confidence <= ?")
+			params.append(max_confidence)
+		if model_id is not None:
+			where.append("s.model_id = ?")
+			params.append(model_id)
+		if since is not None:
+			where.append("s.created >= ?")
+			params.append(since)
+		if until is not None:
+			where.append("s.created < ?")
+			params.append(until)
+		if q:
+			if self.fts:
+				where.append("s.id IN (SELECT rowid FROM sentences_fts WHERE sentences_fts MATCH ?)")
+				params.append(q)
+			else:
+				where.append("s.text LIKE ?")
+				params.append(f"%{q}%")
+		return where, params
+
+	def query_sentences(
+		self,
+		label: Optional[str] = None,
+		min_confidence: Optional[float] = None,
+		max_confidence: Optional[float] = None,
+		model_id: Optional[str] = None,
+		since: Optional[float] = None,
+		until: Optional[float] = None,
+		q: Optional[str] = None,
+		limit: int = 50,
+		offset: int = 0,
+	) -> Dict[str, Any]:
+		"""Stored sentences matching the filters, newest first, one page at a time."""
+		where, params = self._sentence_filters(label, min_confidence, max_confidence, model_id, since, until, q)
+		clause = f"WHERE {' AND '.join(where)}" if where else ""
+		with self._connection() as conn, _search_errors(q):
+			total = conn.execute(f"SELECT COUNT(*) FROM sentences s {clause}", params).fetchone()[0]
+			rows = conn.execute(
+				"SELECT s.analysis_id, s.sentence_index, s.label, s.confidence, s.start_char, s.end_char, "
+				f"s.text, s.model_id, s.created FROM sentences s {clause} "
+				"ORDER BY s.created DESC, s.id DESC LIMIT ? OFFSET ?",
+				(*params, limit, offset),
+			).fetchall()
+		return {"total": total, "limit": limit, "offset": offset, "items": [dict(r) for r in rows]}
+
+	def query_analyses(
+		self,
+		label: Optional[str] = None,
+		min_confidence: Optional[float] = None,
+		model_id: Optional[str] = None,
+		since: Optional[float] = None,
+		until: Optional[float] = None,
+		q: Optional[str] = None,
+		limit: int = 50,
+		offset: int = 0,
+	) -> Dict[str, Any]:
+		"""Analyses with at least one sentence matching the filters, newest first."""
+		where, params = self._sentence_filters(label, min_confidence, None, model_id, since, until, q)
+		if where:
+			clause = f"WHERE a.id IN (SELECT s.analysis_id FROM sentences s WHERE {' AND '.join(where)})"
+		else:
+			clause = ""
+		with self._connection() as conn, _search_errors(q):
+			total = conn.execute(f"SELECT COUNT(*) FROM analyses a {clause}", params).fetchone()[0]
+			rows = conn.execute(
+				"SELECT a.id, a.created, a.model_id, a.route, a.threshold, a.elapsed_seconds, a.sentence_count, "
+				f"a.fallacy_types FROM analyses a {clause} ORDER BY a.created DESC, a.rowid DESC LIMIT ? OFFSET ?",
+				(*params, limit, offset),
+			).fetchall()
+		items = []
+		for r in rows:
+			item = dict(r)
+			item["fallacy_types"] = json.loads(item["fallacy_types"])
+			items.append(item)
+		return {"total": total, "limit": limit, "offset": offset, "items": items}
+
+
+_store: Optional[ResultStore] = None
+_store_loaded = False
+_store_failed_at: Optional[float] = None
+_store_lock = threading.Lock()
+
+
+def get_result_store() -> Optional[ResultStore]:
+	"""
+	Result store at FALLACY_RESULT_DB, or None when results are not persisted.
+	Raises ResultStoreUnavailable when it cannot be opened; the failure is logged once
+	and not retried for _STORE_RETRY_SECONDS.
+	"""
+	global _store, _store_loaded, _store_failed_at
+	with _store_lock:
+		if not _store_loaded:
+			path = os.getenv("FALLACY_RESULT_DB")
+			if path and _store_failed_at is not None and time.monotonic() - _store_failed_at < _STORE_RETRY_SECONDS:
+				raise ResultStoreUnavailable(f"Result store {path} is unavailable")
+			try:
+				_store = ResultStore(path) if path else None
+			except Exception as e:
+				_store_failed_at = time.monotonic()
+				logger.exception("Could not open result store %s", path)
+				raise ResultStoreUnavailable(f"Result store {path} is unavailable: {e}") from e
+			_store_loaded = True
+			_store_failed_at = None
+	return _store
+
+
+def set_result_store(store: Optional[ResultStore]) -> None:
+	global _store, _store_loaded, _store_failed_at
+	_store = store
+	_store_loaded = True
+	_store_failed_at = None
@@ -0,0 +1,186 @@
+import io
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+_NOOP = nullcontext()
+
+# Trace ids may come from clients and become file names
+_TRACE_ID_RE = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def valid_trace_id(trace_id: Optional[str]) -> bool:
+	return bool(trace_id) and _TRACE_ID_RE.fullmatch(trace_id) is not None
+
+
+class Trace:
+	"""Span events for one request; only created when tracing is enabled."""
+
+	def __init__(self, trace_id: str) -> None:
+		self.trace_id = trace_id
+		self.started = time.time()
+		self._t0 = time.perf_counter()
+		self.spans: List[Dict[str, Any]] = []
+		self.attributes: Dict[str, Any] = {}
+		self.profile: Optional[str] = None
+
+	@contextmanager
+	def span(self, name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+		record = {"name": name, "start_ms": 0.0, "duration_ms": 0.0, "attributes": attrs}
+		t0 = time.perf_counter()
+		try:
+			yield record
+		except BaseException as e:
+			record["attributes"]["error"] = f"{type(e).__name__}: {e}"
+			raise
+		finally:
+			record["start_ms"] = round((t0 - self._t0) * 1000, 3)
+			record["duration_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+			self.spans.append(record)
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {
+			"trace_id": self.trace_id,
+			"started": self.started,
+			"duration_ms": round((time.perf_counter() - self._t0) * 1000, 3),
+			"attributes": self.attributes,
+			"spans": sorted(self.spans, key=lambda s: s["start_ms"]),
+			"profile": self.profile,
+		}
+
+
+class Exporter(ABC):
+	"""Receives finished traces. Subclass and pass to set_exporter()."""
+
+	@abstractmethod
+	def export(self, trace: Dict[str, Any]) -> None:
+		"""Called once per finished trace with Trace.to_dict()."""
+
+
+class JSONFileExporter(Exporter):
+	"""Writes one <trace_id>.json file per trace into a directory."""
+
+	def __init__(self, directory: str) -> None:
+		self.directory = Path(directory)
+
+	def export(self, trace: Dict[str, Any]) -> None:
+		trace_id = trace["trace_id"]
+		if not valid_trace_id(trace_id):
+			raise ValueError(f"Refusing to export trace with unsafe id {trace_id!r}")
+		self.directory.mkdir(parents=True, exist_ok=True)
+		directory = self.directory.resolve()
+		path = (directory / f"{trace_id}.json").resolve()
+		if path.parent != directory:
+			raise ValueError(f"Trace path {path} escapes {directory}")
+		path.write_text(json.dumps(trace, indent=2), encoding="utf-8")
+
+
+_current: ContextVar[Optional[Trace]] = ContextVar("fallacy_trace", default=None)
+_exporter: Optional[Exporter] = JSONFileExporter(os.getenv("FALLACY_TRACE_DIR", "traces"))
+
+
+def set_exporter(exporter: Optional[Exporter]) -> None:
+	global _exporter
+	_exporter = exporter
+
+
+def current() -> Optional[Trace]:
+	return _current.get()
+
+
+def current_trace_id() -> Optional[str]:
+	trace = _current.get()
+	return trace.trace_id if trace else None
+
+
+def span(name: str, **attrs: Any):
+	"""Span in the active trace, or a shared no-op context when tracing is off."""
+	trace = _current.get()
+	if trace is None:
+		return _NOOP
+	return trace.span(name, **attrs)
+
+
+def set_attribute(key: str, value: Any) -> None:
+	trace = _current.get()
+	if trace is not None:
+		trace.attributes[key] = value
+
+
+# Only one profiler may be active per process (Python 3.12+ refuses a second
+# cProfile), so profiled requests take turns; the rest are traced unprofiled.
+_profile_lock = threading.Lock()
+
+
+class _Profiler:
+	"""Sampling profiler via pyinstrument when installed; falls back to cProfile."""
+
+	def __init__(self) -> None:
+		try:
+			from pyinstrument import Profiler
+			self._impl = Profiler(interval=0.001)
+			self._kind = "pyinstrument"
+		except ImportError:
+			import cProfile
+			self._impl = cProfile.Profile()
+			self._kind = "cprofile"
+
+	def start(self) -> None:
+		if self._kind == "pyinstrument":
+			self._impl.start()
+		else:
+			self._impl.enable()
+
+	def stop(self) -> str:
+		if self._kind == "pyinstrument":
+			self._impl.stop()
+			return self._impl.output_text(unicode=False, color=False)
+		import pstats
+		self._impl.disable()
+		out = io.StringIO()
+		out.write("cProfile output (covers every thread active during the request)\n")
+		pstats.Stats(self._impl, stream=out).sort_stats("cumulative").print_stats(40)
+		return out.getvalue()
+
+
+@contextmanager
+def start_trace(trace_id: Optional[str] = None, profile: bool = False) -> Iterator[Trace]:
+	"""Activate a trace for the current context and export it on exit; unsafe ids are replaced."""
+	trace = Trace(trace_id if valid_trace_id(trace_id) else uuid.uuid4().hex)
+	token = _current.set(trace)
+	profiler = None
+	if profile:
+		if not _profile_lock.acquire(blocking=False):
+			trace.attributes["profile_skipped"] = "another request is being profiled"
+		else:
+			try:
+				profiler = _Profiler()
+				profiler.start()
+			except Exception as e:
+				profiler = None
+				_profile_lock.release()
+				trace.attributes["profile_skipped"] = f"profiler failed to start: {type(e).__name__}: {e}"
+	try:
+		yield trace
+	finally:
+		if profiler:
+			try:
+				trace.profile = profiler.stop()
+			except Exception as e:
+				trace.attributes["profile_skipped"] = f"profiler failed to stop: {type(e).__name__}: {e}"
+			finally:
+				_profile_lock.release()
+		_current.reset(token)
+		if _exporter is not None:
+			try:
+				_exporter.export(trace.to_dict())
+			except Exception:
+				pass
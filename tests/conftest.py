@@ -0,0 +1,16 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'scripts'))
+
+
+@pytest.fixture
+def simulator():
+    """scripts/openai_simulator.py served in-process with no latency, set as OPENAI_BASE_URL"""
+    from openai_simulator import LocalSimulator
+    with LocalSimulator() as sim:
+        yield sim
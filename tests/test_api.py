@@ -0,0 +1,14 @@
+import pytest
+
+pytest.importorskip('httpx')
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import api  # noqa: E402
+
+
+@pytest.mark.parametrize('path', ['/analyze', '/jobs'])
+def test_unknown_output_mode_is_rejected_up_front(path):
+    resp = TestClient(api.app).post(path, json={'text': 'Everyone agrees.', 'model_id': 'm', 'output_mode': 'xml'})
+    assert resp.status_code == 422
+    assert resp.json()['detail'][0]['loc'] == ['body', 'output_mode']
@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+from service.batching import MicroBatcher
+
+
+class FakeModel:
+    """classify() that labels each sentence with its own text and records every call"""
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def __call__(self, model_id, output_mode, max_tokens, text, sentences):
+        with self.lock:
+            self.calls.append((text, list(sentences)))
+        if self.fail:
+            raise RuntimeError('model down')
+        preds = {i: (s, 1.0) for i, s in enumerate(sentences)}
+        dists = {i: {s: 1.0} for i, s in enumerate(sentences)}
+        return preds, dists, {'prompt_tokens': 100}, len(sentences)
+
+
+def submit_all(batcher, docs):
+    return [batcher.submit('m', 'json', ' '.join(doc), doc, 10, 64) for doc in docs]
+
+
+def test_batched_results_go_back_to_their_own_callers():
+    model = FakeModel()
+    batcher = MicroBatcher(model, max_wait_ms=200)
+    docs = [['a1', 'a2'], ['b1'], ['c1', 'c2', 'c3']]
+    futures = submit_all(batcher, docs)
+
+    for doc, future in zip(docs, futures):
+        preds, dists, usage, salvaged = future.result(timeout=5)
+        assert preds == {i: (s, 1.0) for i, s in enumerate(doc)}
+        assert dists == {i: {s: 1.0} for i, s in enumerate(doc)}
+        assert usage['prompt_tokens'] == round(100 * len(doc) / 6)
+    assert len(model.calls) == 1
+    text, sentences = model.calls[0]
+    assert sentences == ['a1', 'a2', 'b1', 'c1', 'c2', 'c3']
+    assert text.startswith('[Document 1] a1 a2\n\n[Document 2] b1')
+
+
+def test_sentence_budget_splits_batches():
+    model = FakeModel()
+    batcher = MicroBatcher(model, max_wait_ms=200, max_batch_sentences=3)
+    docs = [['a1', 'a2'], ['b1', 'b2'], ['c1']]
+    futures = submit_all(batcher, docs)
+
+    for doc, future in zip(docs, futures):
+        assert future.result(timeout=5)[0] == {i: (s, 1.0) for i, s in enumerate(doc)}
+    assert [sentences for _, sentences in model.calls] == [['a1', 'a2'], ['b1', 'b2', 'c1']]
+
+
+def test_model_error_reaches_every_caller():
+    batcher = MicroBatcher(FakeModel(fail=True), max_wait_ms=200)
+    for future in submit_all(batcher, [['a1'], ['b1']]):
+        with pytest.raises(RuntimeError, match='model down'):
+            future.result(timeout=5)
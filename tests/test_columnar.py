@@ -0,0 +1,39 @@
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from service.columnar import ColumnarResult, from_table, read_file, write_file  # noqa: E402
+
+RESULT = {
+    'input_text': 'Everyone agrees. So it is true.',
+    'fallacies': [
+        {'fallacy_type': 'ad populum', 'start_char': 0, 'end_char': 15, 'confidence': 0.9},
+        {'fallacy_type': 'none', 'start_char': 17, 'end_char': 30, 'confidence': 0.75},
+    ],
+    'missing_sentences': [],
+    'model_id': 'ft:test',
+}
+
+
+@pytest.mark.parametrize('fmt, name', [
+    ('parquet', 'out.parquet'), ('parquet', 'out.json'), ('parquet', 'out.pq'),
+    ('arrow', 'out.arrow'), ('arrow', 'out.bin'),
+])
+def test_read_file_detects_format_from_content(tmp_path, fmt, name):
+    path = str(tmp_path / name)
+    write_file(path, [ColumnarResult.from_result(RESULT, id=1)], fmt)
+    [row] = list(from_table(read_file(path)))
+    assert row.to_dict()['fallacies'][0]['text'] == 'Everyone agrees'
+
+
+def test_read_file_rejects_other_files(tmp_path):
+    path = tmp_path / 'out.parquet'
+    path.write_text('{"not": "columnar"}', encoding='utf-8')
+    with pytest.raises(ValueError, match='neither'):
+        read_file(str(path))
+
+
+def test_ids_keep_their_type(tmp_path):
+    path = str(tmp_path / 'out.parquet')
+    write_file(path, [ColumnarResult.from_result(RESULT, id=i) for i in (7, '7', None)])
+    assert [r.id for r in from_table(read_file(path))] == [7, '7', None]
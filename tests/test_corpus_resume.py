@@ -0,0 +1,138 @@
+import json
+from argparse import Namespace
+
+import pytest
+
+from openai import OpenAI
+
+
+@pytest.fixture
+def cli():
+    import detect_fallacies_openai
+    return detect_fallacies_openai
+
+
+def corpus_args(tmp_path, **overrides):
+    args = Namespace(
+        model='ft:test', corpus=str(tmp_path / 'corpus.jsonl'), output=str(tmp_path / 'out.ndjson'),
+        checkpoint=None, checkpoint_every=2, concurrency=2, text_field='text', id_field='id',
+        include_text=False, format='json', overwrite=False,
+    )
+    for k, v in overrides.items():
+        setattr(args, k, v)
+    return args
+
+
+def write_corpus(path, ids):
+    with open(path, 'a', encoding='utf-8') as f:
+        for i in ids:
+            f.write(json.dumps({'id': i, 'text': f'Record {i} says everyone agrees. So it must be true.'}) + '\n')
+
+
+def read_output(path):
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+def test_corpus_output_keeps_input_order(simulator, cli, tmp_path):
+    write_corpus(tmp_path / 'corpus.jsonl', range(7))
+    cli.run_corpus(OpenAI(), corpus_args(tmp_path))
+
+    out = read_output(tmp_path / 'out.ndjson')
+    assert [r['id'] for r in out] == list(range(7))
+    assert all('input_text' not in r and r['total_sentences'] == 2 for r in out)
+    ckpt = json.loads((tmp_path / 'out.ndjson.ckpt').read_text(encoding='utf-8'))
+    assert ckpt['records'] == 7
+    assert ckpt['output_bytes'] == (tmp_path / 'out.ndjson').stat().st_size
+
+
+def test_rerun_drops_partial_tail_and_resumes(simulator, cli, tmp_path):
+    write_corpus(tmp_path / 'corpus.jsonl', range(3))
+    cli.run_corpus(OpenAI(), corpus_args(tmp_path))
+    # A crash after the last checkpoint leaves a partial line behind
+    with open(tmp_path / 'out.ndjson', 'a', encoding='utf-8') as f:
+        f.write('{"id": 3, "fallac')
+    write_corpus(tmp_path / 'corpus.jsonl', range(3, 5))
+
+    cli.run_corpus(OpenAI(), corpus_args(tmp_path))
+    assert [r['id'] for r in read_output(tmp_path / 'out.ndjson')] == [0, 1, 2, 3, 4]
+
+
+def test_missing_output_with_checkpoint_is_an_error(simulator, cli, tmp_path):
+    write_corpus(tmp_path / 'corpus.jsonl', range(2))
+    cli.run_corpus(OpenAI(), corpus_args(tmp_path))
+    (tmp_path / 'out.ndjson').unlink()
+    with pytest.raises(SystemExit):
+        cli.run_corpus(OpenAI(), corpus_args(tmp_path))
+
+
+def test_bad_records_become_error_records(simulator, cli, tmp_path):
+    write_corpus(tmp_path / 'corpus.jsonl', [0])
+    with open(tmp_path / 'corpus.jsonl', 'ab') as f:
+        f.write(b'{"id": 1, "text": "broken\n')
+        f.write(b'{"id": 2, "text": "bad \xff bytes"}\n')
+    write_corpus(tmp_path / 'corpus.jsonl', [3])
+    cli.run_corpus(OpenAI(), corpus_args(tmp_path))
+
+    out = read_output(tmp_path / 'out.ndjson')
+    assert [r['id'] for r in out] == [0, 1, 2, 3]
+    assert 'error' not in out[0] and 'error' not in out[3]
+    assert out[1]['error'].startswith('Invalid JSON on line 2')
+    assert out[2]['error'].startswith('Invalid JSON on line 3')
+
+
+def test_unreadable_text_file_becomes_error_record(simulator, cli, tmp_path):
+    docs = tmp_path / 'docs'
+    docs.mkdir()
+    (docs / 'a.txt').write_text('Everyone agrees. So it is true.', encoding='utf-8')
+    (docs / 'b.txt').write_bytes(b'\xff\xfe not utf-8')
+    cli.run_corpus(OpenAI(), corpus_args(tmp_path, corpus=str(docs)))
+
+    out = read_output(tmp_path / 'out.ndjson')
+    assert [r['id'] for r in out] == ['a.txt', 'b.txt']
+    assert out[1]['error'].startswith('Cannot read b.txt')
+
+
+def test_aborted_run_keeps_its_progress(simulator, cli, tmp_path, monkeypatch):
+    write_corpus(tmp_path / 'corpus.jsonl', range(3))
+    real = cli.iter_corpus
+
+    def interrupted(*args):
+        yield from real(*args)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(cli, 'iter_corpus', interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        cli.run_corpus(OpenAI(), corpus_args(tmp_path, checkpoint_every=10))
+    assert json.loads((tmp_path / 'out.ndjson.ckpt').read_text(encoding='utf-8'))['records'] == 3
+
+    monkeypatch.setattr(cli, 'iter_corpus', real)
+    write_corpus(tmp_path / 'corpus.jsonl', [3])
+    cli.run_corpus(OpenAI(), corpus_args(tmp_path))
+    assert [r['id'] for r in read_output(tmp_path / 'out.ndjson')] == [0, 1, 2, 3]
+
+
+def test_existing_output_without_checkpoint_is_kept(simulator, cli, tmp_path):
+    write_corpus(tmp_path / 'corpus.jsonl', [0])
+    (tmp_path / 'out.ndjson').write_text('{"id": "earlier run"}\n', encoding='utf-8')
+    with pytest.raises(SystemExit):
+        cli.run_corpus(OpenAI(), corpus_args(tmp_path))
+    assert (tmp_path / 'out.ndjson').read_text(encoding='utf-8') == '{"id": "earlier run"}\n'
+
+    cli.run_corpus(OpenAI(), corpus_args(tmp_path, overwrite=True))
+    assert [r['id'] for r in read_output(tmp_path / 'out.ndjson')] == [0]
+
+
+def test_columnar_rerun_discards_uncheckpointed_parts(simulator, cli, tmp_path):
+    pytest.importorskip('pyarrow')
+    from service.columnar import from_table, read_file
+
+    write_corpus(tmp_path / 'corpus.jsonl', range(4))
+    args = corpus_args(tmp_path, output=str(tmp_path / 'parts'), format='parquet')
+    cli.run_corpus(OpenAI(), args)
+    # A part written after the last checkpoint, before a crash
+    (tmp_path / 'parts' / 'part-00002.parquet').write_bytes(b'partial')
+    write_corpus(tmp_path / 'corpus.jsonl', [4])
+
+    cli.run_corpus(OpenAI(), args)
+    ids = [r.id for path in sorted((tmp_path / 'parts').iterdir()) for r in from_table(read_file(str(path)))]
+    assert ids == [0, 1, 2, 3, 4]
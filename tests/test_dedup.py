@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip('pandas')
+
+from dedup_splits import NUM_PERM, DedupIndex, choose_bands  # noqa: E402
+
+TEXT = ' '.join(f'word{i % 37} item{i}' for i in range(40))
+
+
+@pytest.mark.parametrize('threshold', [0.5, 0.7, 0.8, 0.9])
+def test_bands_catch_pairs_at_the_threshold(threshold):
+    bands, rows = choose_bands(threshold)
+    assert bands * rows == NUM_PERM
+    assert 1 - (1 - threshold ** rows) ** bands >= 0.99
+
+
+def test_near_duplicate_across_splits_is_a_leak_with_label_conflict():
+    index = DedupIndex(0.8)
+    index.add('test', 0, TEXT, 'ad hominem')
+    index.add('test', 1, 'something else entirely', 'none')
+    index.add('train', 0, TEXT.replace('item20', 'changed'), 'none')
+    index.add('train', 1, TEXT, 'ad hominem')
+
+    assert [(e['split'], e['row'], e['kind']) for e in index.leaks] == [('train', 0, 'near'), ('train', 1, 'exact')]
+    assert index.leaks[0]['matches']['row'] == 0
+    assert index.drop == {('train', 0), ('train', 1)}
+    assert index.conflicts() == 1
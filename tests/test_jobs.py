@@ -0,0 +1,31 @@
+from service.jobs import FAILED, QUEUED, RUNNING, JobStore
+
+
+def test_live_claims_are_not_requeued(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    job_id = store.enqueue({'text': 'x'})
+    assert store.claim('worker-a')['id'] == job_id
+    assert store.requeue_stale(60.0) == 0
+    assert store.status(job_id)['status'] == RUNNING
+    assert not store.save_chunk(job_id, 'worker-b', 0, 1, [])
+    assert store.save_chunk(job_id, 'worker-a', 0, 1, [])
+
+
+def test_stale_claim_is_requeued_then_failed_after_max_attempts(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    job_id = store.enqueue({'text': 'x'})
+    for attempt in (1, 2):
+        assert store.claim(f'worker-{attempt}')['id'] == job_id
+        # A negative stale period makes every running claim stale
+        assert store.requeue_stale(-1.0, max_attempts=3) == 1
+        status = store.status(job_id)
+        assert (status['status'], status['attempts']) == (QUEUED, attempt)
+
+    store.claim('worker-3')
+    assert store.requeue_stale(-1.0, max_attempts=3) == 0
+    status = store.status(job_id)
+    assert (status['status'], status['attempts']) == (FAILED, 3)
+    assert 'every attempt (3)' in status['error']
+    assert store.claim('worker-4') is None
+    # The dead worker cannot overwrite the failure
+    assert not store.complete(job_id, 'worker-3', {})
@@ -0,0 +1,93 @@
+import pytest
+
+from service.parsing import parse_codes, parse_results, predictions
+from service.prompts import CODE_LABELS, LABEL_CODES, LABELS
+
+
+def tokens(*texts, logprob=-0.1):
+    return [{'token': t, 'logprob': logprob, 'top_logprobs': []} for t in texts]
+
+
+def labels(preds):
+    return {i: label for i, (label, _) in preds.items()}
+
+
+def test_parse_results_complete():
+    items, complete = parse_results('{"results": [{"index": 1, "label": "ad hominem", "confidence": 0.9}]}')
+    assert complete
+    assert items == [{'index': 1, 'label': 'ad hominem', 'confidence': 0.9}]
+
+
+def test_parse_results_salvages_truncated_output():
+    content = ('{"results": [{"index": 1, "label": "ad hominem", "confidence": 0.9}, '
+               '{"index": 2, "label": "none", "confidence": 0.8}, {"index": 3, "lab')
+    items, complete = parse_results(content)
+    assert not complete
+    assert [item['index'] for item in items] == [1, 2]
+
+
+def test_parse_results_skips_malformed_items():
+    content = '{"results": [{"index": 1, "label": "none"}, {"index": 2, label}, {"index": 3, "label": "none"}]}'
+    items, complete = parse_results(content)
+    assert not complete
+    assert [item['index'] for item in items] == [1, 3]
+
+
+@pytest.mark.parametrize('content', ['', 'not json', '{"results": "none"}'])
+def test_parse_results_without_array(content):
+    assert parse_results(content) == ([], False)
+
+
+def test_predictions_first_item_wins_and_unknown_labels_are_none():
+    items = [
+        {'index': 1, 'label': 'ad hominem', 'confidence': 0.9},
+        {'index': 1, 'label': 'ad populum', 'confidence': 0.5},
+        {'index': 2, 'label': 'made up', 'confidence': 'high'},
+        {'index': 9, 'label': 'none', 'confidence': 0.5},
+    ]
+    assert predictions(items, 2, LABELS) == {0: ('ad hominem', 0.9), 1: ('none', 0.0)}
+
+
+def test_parse_codes_without_logprobs():
+    preds, dists, complete = parse_codes('A\nO\n', None, 2, CODE_LABELS)
+    assert labels(preds) == {0: 'ad hominem', 1: 'none'}
+    assert dists == {}
+    assert complete
+
+
+def test_parse_codes_incomplete():
+    preds, _, complete = parse_codes('A', tokens('A'), 2, CODE_LABELS)
+    assert labels(preds) == {0: 'ad hominem'}
+    assert not complete
+
+
+@pytest.mark.parametrize('content, pieces', [
+    ('1. A\nB', ['1', '.', ' A', '\n', 'B']),
+    ('A.\n2) B', ['A', '.\n', '2', ')', ' B']),
+    ('A\n\nB', ['A', '\n\n', 'B']),
+])
+def test_parse_codes_paths_agree(content, pieces):
+    plain, _, plain_complete = parse_codes(content, None, 2, CODE_LABELS)
+    with_logprobs, _, complete = parse_codes(content, tokens(*pieces), 2, CODE_LABELS)
+    assert labels(plain) == labels(with_logprobs) == {0: 'ad hominem', 1: 'ad populum'}
+    assert plain_complete and complete
+
+
+def test_parse_codes_line_without_code_still_counts():
+    preds, _, complete = parse_codes('1.\nB', tokens('1', '.\n', 'B'), 2, CODE_LABELS)
+    assert labels(preds) == {1: 'ad populum'}
+    assert complete
+
+
+def test_parse_codes_distribution_from_top_logprobs():
+    a, none = LABEL_CODES['ad hominem'], LABEL_CODES['none']
+    tok = {'token': a, 'logprob': -0.5, 'top_logprobs': [
+        {'token': a, 'logprob': -0.5},
+        {'token': none, 'logprob': -1.5},
+        {'token': '1', 'logprob': -3.0},
+    ]}
+    preds, dists, _ = parse_codes(a, [tok], 1, CODE_LABELS)
+    assert preds[0][0] == 'ad hominem'
+    assert preds[0][1] == pytest.approx(0.6065, abs=1e-4)
+    assert set(dists[0]) == {'ad hominem', 'none'}
+    assert dists[0]['none'] == pytest.approx(0.2231, abs=1e-4)
@@ -0,0 +1,46 @@
+from service.analyzer import _split_sections
+
+
+def check_pieces(text, sections):
+    assert ''.join(s for _, s in sections) == text
+    for offset, section in sections:
+        assert text[offset:offset + len(section)] == section
+
+
+def test_short_text_is_one_section():
+    assert _split_sections('One. Two.', 100) == [(0, 'One. Two.')]
+
+
+def test_cuts_at_paragraph_breaks_after_a_sentence():
+    paragraph = 'This is a sentence. Here is another one.\n\n'
+    text = paragraph * 10
+    sections = _split_sections(text, 100)
+    check_pieces(text, sections)
+    assert len(sections) > 1
+    for _, section in sections[:-1]:
+        assert section.rstrip().endswith('one.')
+        assert len(section) >= 100
+
+
+def test_heading_stays_with_its_paragraph():
+    text = 'Intro sentence here.\n\nHeading without period\n\nBody text follows here. ' * 3
+    sections = _split_sections(text, 25)
+    check_pieces(text, sections)
+    for _, section in sections:
+        assert not section.rstrip().endswith('Heading without period')
+
+
+def test_falls_back_to_line_breaks_after_a_sentence():
+    text = 'First line is long enough.\nwrapped line without end\nSecond sentence ends.\nTail'
+    sections = _split_sections(text, 10)
+    check_pieces(text, sections)
+    assert [s for _, s in sections] == [
+        'First line is long enough.',
+        '\nwrapped line without end\nSecond sentence ends.',
+        '\nTail',
+    ]
+
+
+def test_no_sentence_end_means_no_cut():
+    text = 'no punctuation at all ' * 20
+    assert _split_sections(text, 50) == [(0, text)]
@@ -0,0 +1,26 @@
+import pytest
+
+from openai_simulator import parse_prompt
+from service.prompts import LABEL_CODES, LABELS, OUTPUT_CODES, OUTPUT_JSON, build_messages
+
+SENTENCES = ['Heading\n\nBody one.', 'Two.', '3. Looks like a number.', 'Last\n']
+
+
+@pytest.mark.parametrize('mode', [OUTPUT_JSON, OUTPUT_CODES])
+def test_parse_prompt_keeps_multiline_sentences(mode):
+    parsed_mode, labels, sentences = parse_prompt(build_messages('Some paragraph.\n\nMore.', SENTENCES, mode))
+    assert parsed_mode == mode
+    assert sentences == [s.rstrip('\n') for s in SENTENCES]
+    if mode == OUTPUT_CODES:
+        assert labels == {code: label for label, code in LABEL_CODES.items()}
+    else:
+        assert labels == LABELS
+
+
+def test_simulator_answers_every_sentence(simulator):
+    from openai import OpenAI
+    from service.parsing import parse_results
+    msg = OpenAI().chat.completions.create(model='sim', messages=build_messages('x', SENTENCES))
+    items, complete = parse_results(msg.choices[0].message.content)
+    assert complete
+    assert [item['index'] for item in items] == [1, 2, 3, 4]
@@ -0,0 +1,101 @@
+import pytest
+
+from service import store as store_module
+from service.store import ResultStore, ResultStoreUnavailable
+
+
+def result(text, labels, model_id='m1'):
+    fallacies = []
+    pos = 0
+    for sentence, (label, confidence) in zip(text.split('. '), labels):
+        fallacies.append({'fallacy_type': label, 'text': sentence, 'start_char': pos,
+                          'end_char': pos + len(sentence), 'confidence': confidence})
+        pos += len(sentence) + 2
+    return {
+        'input_text': text,
+        'model_id': model_id,
+        'fallacies': fallacies,
+        'fallacy_types': sorted({label for label, _ in labels if label != 'none'}),
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultStore(str(tmp_path / 'results.db'))
+    store.first = store.save(result('Everyone buys it. The sky is blue', [('ad populum', 0.9), ('none', 0.8)]))
+    store.second = store.save(result('You are a fool. Everyone agrees', [('ad hominem', 0.7), ('ad populum', 0.4)],
+                                     model_id='m2'), threshold=0.5)
+    return store
+
+
+def test_get_round_trips_a_result(store):
+    analysis = store.get(store.second)
+    assert analysis['model_id'] == 'm2'
+    assert analysis['threshold'] == 0.5
+    assert analysis['fallacy_types'] == ['ad hominem', 'ad populum']
+    assert [f['text'] for f in analysis['fallacies']] == ['You are a fool', 'Everyone agrees']
+    assert store.get('missing') is None
+
+
+def test_query_sentences_filters(store):
+    assert store.query_sentences(label='ad populum')['total'] == 2
+    strong = store.query_sentences(label='ad populum', min_confidence=0.5)
+    assert [item['text'] for item in strong['items']] == ['Everyone buys it']
+    assert store.query_sentences(model_id='m2', max_confidence=0.5)['items'][0]['text'] == 'Everyone agrees'
+
+
+def test_query_sentences_pages_newest_first(store):
+    page = store.query_sentences(limit=2, offset=0)
+    assert page['total'] == 4
+    assert [item['analysis_id'] for item in page['items']] == [store.second, store.second]
+    rest = store.query_sentences(limit=2, offset=2)
+    assert [item['analysis_id'] for item in rest['items']] == [store.first, store.first]
+
+
+def test_text_search(store):
+    found = store.query_sentences(q='everyone')
+    assert sorted(item['text'] for item in found['items']) == ['Everyone agrees', 'Everyone buys it']
+    assert store.query_analyses(q='fool')['items'][0]['id'] == store.second
+
+
+def test_query_analyses_by_label(store):
+    page = store.query_analyses(label='ad hominem')
+    assert page['total'] == 1
+    assert page['items'][0]['fallacy_types'] == ['ad hominem', 'ad populum']
+    assert store.query_analyses()['total'] == 2
+
+
+def test_malformed_search_is_a_value_error(store):
+    if not store.fts:
+        pytest.skip('SQLite build without FTS5')
+    with pytest.raises(ValueError, match='Invalid search query'):
+        store.query_sentences(q='"unbalanced')
+
+
+def test_same_timestamp_still_newest_first(tmp_path, monkeypatch):
+    monkeypatch.setattr(store_module.time, 'time', lambda: 1000.0)
+    store = ResultStore(str(tmp_path / 'results.db'))
+    ids = [store.save(result(f'Sentence {i}', [('none', 0.5)])) for i in range(5)]
+    assert [item['id'] for item in store.query_analyses()['items']] == ids[::-1]
+    assert [item['analysis_id'] for item in store.query_sentences()['items']] == ids[::-1]
+
+
+def test_unopenable_store_fails_fast(monkeypatch, tmp_path):
+    monkeypatch.setenv('FALLACY_RESULT_DB', str(tmp_path / 'missing' / 'results.db'))
+    monkeypatch.setattr(store_module, '_store_loaded', False)
+    monkeypatch.setattr(store_module, '_store_failed_at', None)
+    with pytest.raises(ResultStoreUnavailable):
+        store_module.get_result_store()
+    monkeypatch.setattr(store_module, 'ResultStore', None)  # a retry would fail differently
+    with pytest.raises(ResultStoreUnavailable):
+        store_module.get_result_store()
+
+
+def test_analysis_survives_unopenable_store(simulator, monkeypatch, tmp_path):
+    from service.analyzer import analyze_text
+    monkeypatch.setenv('FALLACY_RESULT_DB', str(tmp_path / 'missing' / 'results.db'))
+    monkeypatch.setattr(store_module, '_store_loaded', False)
+    monkeypatch.setattr(store_module, '_store_failed_at', None)
+    out = analyze_text('Everyone agrees with this. So it must be true.', model_id='ft:test')
+    assert out['analysis_id'] is None
+    assert len(out['fallacies']) == 2
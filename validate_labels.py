@@ -2,6 +2,123 @@ import pandas as pd
 import json
 from collections import defaultdict
 
+def climate_label_issues(text: str, label: str) -> list[str]:
+    """Heuristic mislabeling checks for one climate example (text lowercased)"""
+    issues = []
+
+    # Check for factual reporting labeled as fallacies
+    if label != 'intentional':
+        # Phrases that suggest factual reporting
+        factual_phrases = [
+            'according to', 'reported', 'study found', 'research shows',
+            'scientists say', 'experts say', 'analysis shows', 'data shows',
+            'modeling shows', 'forecast', 'project', 'estimate',
+            'economists project', 'computer forecasts', 'study from'
+        ]
+
+        if any(phrase in text for phrase in factual_phrases):
+            issues.append("Contains factual reporting language but labeled as fallacy")
+
+    # Check for ad populum mislabelings
+    if label == 'ad populum':
+        # Ad populum should involve "many people believe" or similar
+        populum_indicators = [
+            'many people', 'everyone', 'most people', 'popular',
+            'common belief', 'widely believed', 'people believe',
+            'everyone else', 'majority'
+        ]
+        if not any(indicator in text for indicator in populum_indicators):
+            issues.append("Labeled ad populum but lacks popularity indicators")
+
+    # Check for appeal to emotion mislabelings
+    if label == 'appeal to emotion':
+        # Should have emotional language
+        emotion_indicators = [
+            'terrible', 'awful', 'devastating', 'catastrophic',
+            'fear', 'threat', 'danger', 'panic', 'crisis',
+            'emergency', 'chaos', 'mayhem', 'miserable',
+            'angry', 'scary', 'frightening'
+        ]
+        if not any(indicator in text for indicator in emotion_indicators):
+            # But could be subtle
+            pass
+
+    # Check for false dilemma
+    if label == 'false dilemma':
+        dilemma_indicators = ['either', 'or', 'only two', 'must choose', 'no alternative']
+        if not any(indicator in text for indicator in dilemma_indicators):
+            issues.append("Labeled false dilemma but lacks either/or structure")
+
+    # Check for fallacy of credibility
+    if label == 'fallacy of credibility':
+        # Should involve attacking credibility
+        credibility_indicators = [
+            'not credible', 'unreliable', 'biased', 'funded by',
+            'industry-funded', 'not trustworthy', 'questionable source',
+            'dispute', 'disputed', 'controversial'
+        ]
+        if not any(indicator in text for indicator in credibility_indicators):
+            issues.append("Labeled fallacy of credibility but may just be reporting")
+
+    # Check for fallacy of relevance
+    if label == 'fallacy of relevance':
+        # Hard to check automatically - would need context
+        pass
+
+    # Check for faulty generalization
+    if label == 'faulty generalization':
+        generalization_indicators = [
+            'all', 'every', 'always', 'never', 'none',
+            'must be', 'have to', 'will all', 'all of these'
+        ]
+        if not any(indicator in text for indicator in generalization_indicators):
+            # Could still be a generalization without these words
+            pass
+
+    # Check for equivocation
+    if label == 'equivocation':
+        # Hard to detect automatically - needs word meaning analysis
+        pass
+
+    # Check for intentional
+    if label == 'intentional':
+        # "Intentional" is tricky - it means intentionally using fallacious reasoning
+        # Hard to verify automatically
+        pass
+
+    return issues
+
+def edu_label_issues(text: str, label: str) -> list[str]:
+    """Heuristic mislabeling checks for one education example (text lowercased)"""
+    issues = []
+
+    # Similar checks as climate data
+    if label == 'ad populum':
+        populum_indicators = [
+            'many people', 'everyone', 'most people', 'popular',
+            'common belief', 'widely believed', 'people believe',
+            'everyone else', 'majority', 'best-seller'
+        ]
+        if not any(indicator in text for indicator in populum_indicators):
+            issues.append("Labeled ad populum but lacks popularity indicators")
+
+    if label == 'false causality':
+        causality_indicators = ['causes', 'caused', 'therefore', 'because', 'result of']
+        if not any(indicator in text for indicator in causality_indicators):
+            issues.append("Labeled false causality but lacks causal language")
+
+    if label == 'false dilemma':
+        dilemma_indicators = ['either', 'or', 'must choose', 'only']
+        if not any(indicator in text for indicator in dilemma_indicators):
+            issues.append("Labeled false dilemma but lacks either/or structure")
+
+    if label == 'circular reasoning':
+        circular_indicators = ['because', 'therefore', 'since']
+        # Hard to detect automatically
+        pass
+
+    return issues
+
 def check_climate_data():
     """Check climate dataset for potential mislabelings"""
     print("=" * 80)
@@ -37,88 +154,8 @@ def check_climate_data():
                 if not text or text == 'nan' or not label or label == 'nan':
                     continue
                 
-                issues = []
-                
-                # Check for factual reporting labeled as fallacies
-                if label != 'intentional':
-                    # Phrases that suggest factual reporting
-                    factual_phrases = [
-                        'according to', 'reported', 'study found', 'research shows',
-                        'scientists say', 'experts say', 'analysis shows', 'data shows',
-                        'modeling shows', 'forecast', 'project', 'estimate',
-                        'economists project', 'computer forecasts', 'study from'
-                    ]
-                    
-                    if any(phrase in text for phrase in factual_phrases):
-                        issues.append("Contains factual reporting language but labeled as fallacy")
-                
-                # Check for ad populum mislabelings
-                if label == 'ad populum':
-                    # Ad populum should involve "many people believe" or similar
-                    populum_indicators = [
-                        'many people', 'everyone', 'most people', 'popular',
-                        'common belief', 'widely believed', 'people believe',
-                        'everyone else', 'majority'
-                    ]
-                    if not any(indicator in text for indicator in populum_indicators):
-                        issues.append("Labeled ad populum but lacks popularity indicators")
-                
-                # Check for appeal to emotion mislabelings
-                if label == 'appeal to emotion':
-                    # Should have emotional language
-                    emotion_indicators = [
-                        'terrible', 'awful', 'devastating', 'catastrophic',
-                        'fear', 'threat', 'danger', 'panic', 'crisis',
-                        'emergency', 'chaos', 'mayhem', 'miserable',
-                        'angry', 'scary', 'frightening'
-                    ]
-                    if not any(indicator in text for indicator in emotion_indicators):
-                        # But could be subtle
-                        pass
-                
-                # Check for false dilemma
-                if label == 'false dilemma':
-                    dilemma_indicators = ['either', 'or', 'only two', 'must choose', 'no alternative']
-                    if not any(indicator in text for indicator in dilemma_indicators):
-                        issues.append("Labeled false dilemma but lacks either/or structure")
-                
-                # Check for fallacy of credibility
-                if label == 'fallacy of credibility':
-                    # Should involve attacking credibility
-                    credibility_indicators = [
-                        'not credible', 'unreliable', 'biased', 'funded by',
-                        'industry-funded', 'not trustworthy', 'questionable source',
-                        'dispute', 'disputed', 'controversial'
-                    ]
-                    if not any(indicator in text for indicator in credibility_indicators):
-                        issues.append("Labeled fallacy of credibility but may just be reporting")
-                
-                # Check for fallacy of relevance
-                if label == 'fallacy of relevance':
-                    # Hard to check automatically - would need context
-                    pass
-                
-                # Check for faulty generalization
-                if label == 'faulty generalization':
-                    generalization_indicators = [
-                        'all', 'every', 'always', 'never', 'none',
-                        'must be', 'have to', 'will all', 'all of these'
-                    ]
-                    if not any(indicator in text for indicator in generalization_indicators):
-                        # Could still be a generalization without these words
-                        pass
-                
-                # Check for equivocation
-                if label == 'equivocation':
-                    # Hard to detect automatically - needs word meaning analysis
-                    pass
-                
-                # Check for intentional
-                if label == 'intentional':
-                    # "Intentional" is tricky - it means intentionally using fallacious reasoning
-                    # Hard to verify automatically
-                    pass
-                
+                issues = climate_label_issues(text, label)
+
                 if issues:
                     suspicious.append({
                         'index': idx,
@@ -181,33 +218,8 @@ def check_edu_data():
                 if pd.isna(text) or text == 'nan' or not text.strip():
                     continue
                 
-                issues = []
-                
-                # Similar checks as climate data
-                if label == 'ad populum':
-                    populum_indicators = [
-                        'many people', 'everyone', 'most people', 'popular',
-                        'common belief', 'widely believed', 'people believe',
-                        'everyone else', 'majority', 'best-seller'
-                    ]
-                    if not any(indicator in text for indicator in populum_indicators):
-                        issues.append("Labeled ad populum but lacks popularity indicators")
-                
-                if label == 'false causality':
-                    causality_indicators = ['causes', 'caused', 'therefore', 'because', 'result of']
-                    if not any(indicator in text for indicator in causality_indicators):
-                        issues.append("Labeled false causality but lacks causal language")
-                
-                if label == 'false dilemma':
-                    dilemma_indicators = ['either', 'or', 'must choose', 'only']
-                    if not any(indicator in text for indicator in dilemma_indicators):
-                        issues.append("Labeled false dilemma but lacks either/or structure")
-                
-                if label == 'circular reasoning':
-                    circular_indicators = ['because', 'therefore', 'since']
-                    # Hard to detect automatically
-                    pass
-                
+                issues = edu_label_issues(text, label)
+
                 if issues:
                     suspicious.append({
                         'index': idx,